@@ -6,23 +6,82 @@ Versión liviana de la interfaz para el tablero de bioprocesos
 from __future__ import annotations
 
 import os
+import sys
 import csv
-import glob
+import io
 import math
+import bisect
+import heapq
+import functools
 import time
+import queue
 import random
+import shutil
+import mmap
 import threading
+import atexit
 import datetime as dt
+from array import array
+from collections import deque
 import calendar as pycal
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from importlib import util as importlib_util
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 
-from PIL import Image, ImageTk
+# Pillow se carga recién al abrir la primera imagen (ver _pil)
+Image = None
+ImageTk = None
+
+
+def _pil():
+    global Image, ImageTk
+    if Image is None:
+        from PIL import Image as _Image, ImageTk as _ImageTk
+
+        Image, ImageTk = _Image, _ImageTk
+    return Image, ImageTk
+
+
+# NumPy solo hace falta en las ventanas de gráficos (viene con matplotlib)
+np = None
+
+
+def _numpy():
+    global np
+    if np is None:
+        import numpy as _np  # type: ignore
+
+        np = _np
+    return np
+
+
+@functools.lru_cache(maxsize=None)
+def _has_module(name: str) -> bool:
+    # find_spec recorre sys.path en disco; la respuesta no cambia en ejecución
+    return importlib_util.find_spec(name) is not None
+
+
+# pandas es opcional: solo acelera la primera lectura de backups grandes (None si no está)
+pd = None
+_PANDAS_CHECKED = False
+
+
+def _pandas():
+    global pd, _PANDAS_CHECKED
+    if not _PANDAS_CHECKED:
+        _PANDAS_CHECKED = True
+        if _has_module("pandas"):
+            import pandas as _pd  # type: ignore
+
+            pd = _pd
+    return pd
 
 
 _ADS_I2C = None
+# ADS1115 compartidos entre lectores: (address, gain) -> [dispositivo, n_lectores]
+_ADS_DEVICES = {}
 
 # ===== MODO SIMULADOR =====
 SIMULADOR = os.environ.get("SIMULADOR", "").strip().lower() in {"1", "true", "yes"}
@@ -34,6 +93,9 @@ FLOW_DEBUG_FERMS = {
 }
 
 ASSETS_DIR = os.path.join(os.path.dirname(__file__), "assets")
+# Carpeta de trabajo CSV por defecto (compartida por todos los paneles)
+_PROCESO_DIR = os.path.abspath("./Proceso")
+os.makedirs(_PROCESO_DIR, exist_ok=True)
 
 
 # ===== Configuracion caudalimetro CO2 (ADS1115) =====
@@ -60,12 +122,36 @@ FLOW_MIN_SCCM = float(os.environ.get("FLOW_MIN_SCCM", os.environ.get("FLOW_MIN_M
 FLOW_MAX_SCCM = float(os.environ.get("FLOW_MAX_SCCM", os.environ.get("FLOW_MAX_M3H", "50.0")))
 CO2_DENSITY_G_M3 = float(os.environ.get("CO2_DENSITY_G_M3", "1964.0"))
 BROTH_VOLUME_L = float(os.environ.get("BROTH_VOLUME_L", "5.0"))
+# Factores de conversión precalculados (4-20 mA -> SCCM -> g/L/h)
+_FLOW_SPAN_PER_MA = (FLOW_MAX_SCCM - FLOW_MIN_SCCM) / 16.0 if FLOW_MAX_SCCM > FLOW_MIN_SCCM else 0.0
+_MA_PER_SCCM = 1.0 / _FLOW_SPAN_PER_MA if _FLOW_SPAN_PER_MA > 0.0 else 0.0
+_RATE_K = CO2_DENSITY_G_M3 * 6e-5 / BROTH_VOLUME_L if CO2_DENSITY_G_M3 > 0 and BROTH_VOLUME_L > 0 else 0.0
 
 SAMPLE_PERIOD_SEC_ENV = os.environ.get("SAMPLE_PERIOD_SEC", "").strip()
 SAMPLE_PERIOD_SEC = parse_int(SAMPLE_PERIOD_SEC_ENV, 0) if SAMPLE_PERIOD_SEC_ENV else None
+# Raleo opcional de filas CO2 (0 = desactivado): con estado OK y caudal estable se escribe
+# como mucho una fila cada FLOW_IDLE_EMIT_SEC; los cambios de estado se escriben siempre.
+FLOW_IDLE_EMIT_SEC = float(os.environ.get("FLOW_IDLE_EMIT_SEC", "0") or 0)
+FLOW_DELTA_SCCM = float(os.environ.get("FLOW_DELTA_SCCM", "0.5") or 0.5)
 PLOT_WINDOW_ENV = os.environ.get("PLOT_WINDOW_HOURS", "").strip()
 PLOT_WINDOW_HOURS = float(PLOT_WINDOW_ENV) if PLOT_WINDOW_ENV else 0.0
 MAX_FLOW_HISTORY_HOURS = 24 * 21
+MAX_FLOW_HISTORY_SEC = MAX_FLOW_HISTORY_HOURS * 3600
+# Intervalo mínimo entre redibujos del gráfico de caudal (~10 FPS)
+PLOT_MIN_DRAW_SEC = 0.1
+# Historial de temperatura en memoria para los gráficos (1 muestra/s por fermentador)
+TEMP_HISTORY_DAYS = 14
+
+# ===== DS18B20 (1-Wire) =====
+W1_DEVICES_DIR = "/sys/bus/w1/devices"
+# Conversión simultánea de todos los sensores del bus (kernel >= 5.8)
+W1_BULK_READ = os.path.join(W1_DEVICES_DIR, "w1_bus_master1", "therm_bulk_read")
+# Resolución (9-12 bits). 9 bits = 0.5 °C y ~94 ms de conversión (vs 750 ms a 12 bits),
+# suficiente para la banda de control por defecto. Se escribe en "resolution" en cada
+# arranque: sin escribir "save" en eeprom_cmd el sensor vuelve a 12 bits al apagarse.
+DS18B20_RESOLUTION = max(9, min(12, parse_int(os.environ.get("DS18B20_RES", "9"), 9)))
+DS18B20_CONV_SEC = 0.750 / (1 << (12 - DS18B20_RESOLUTION)) + 0.001
+W1_READ_SIZE = 128
 
 # ===== PINES HARDWARE =====
 RELAY_PINS = {
@@ -101,14 +187,17 @@ def now():
     return dt.datetime.now()
 
 
-def now_str():
-    return now().strftime("%Y-%m-%d %H:%M:%S")
+def now_str(n=None):
+    if n is None:
+        n = dt.datetime.now()
+    return f"{n.year:04d}-{n.month:02d}-{n.day:02d} {n.hour:02d}:{n.minute:02d}:{n.second:02d}"
 
 
 def ymd(date: dt.date) -> str:
-    return date.strftime("%Y-%m-%d")
+    return f"{date.year:04d}-{date.month:02d}-{date.day:02d}"
 
 
+@functools.lru_cache(maxsize=8192)
 def hhmm_ok(s: str) -> bool:
     try:
         h, m = s.split(":")
@@ -119,8 +208,14 @@ def hhmm_ok(s: str) -> bool:
         return False
 
 
+@functools.lru_cache(maxsize=8192)
 def _normalize_date(date_str: str):
     date_str = (date_str or "").strip()
+    if len(date_str) == 10 and date_str[4] == "-":
+        try:
+            return dt.datetime.strptime(date_str, "%Y-%m-%d").date()
+        except Exception:
+            return None
     for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d"):
         try:
             return dt.datetime.strptime(date_str, fmt).date()
@@ -133,29 +228,322 @@ def _restore_focus(widget):
     try:
         root = widget.winfo_toplevel()
         root.focus_force()
-        root.update_idletasks()
+        # Sin update*/update_idletasks: el segundo focus corre después de las tareas idle pendientes
         root.after(10, root.focus_force)
     except Exception:
         pass
 
 
+# ===== Lectura de backups por rango =====
+CSV_SEEK_MIN_SPAN = 1 << 16
+# Desde este tamaño de bloque el backup se parsea con pandas (si está instalado)
+CSV_PANDAS_MIN_BYTES = 1 << 20
+
+
+def _csv_offset_since(buf, cutoff: bytes, lo: int) -> int:
+    # Búsqueda binaria por bytes (buf = mmap del archivo) en un CSV ordenado por timestamp
+    # (primera columna) y luego avance línea a línea comparando bytes, sin decodificar:
+    # devuelve el inicio de la primera fila >= cutoff (o el final del archivo).
+    start = lo
+    hi = len(buf)
+    while hi - lo > CSV_SEEK_MIN_SPAN:
+        mid = (lo + hi) // 2
+        nl = buf.find(b"\n", mid)  # resincroniza al inicio de la línea siguiente
+        line = buf[nl + 1 : nl + 20] if nl >= 0 else b""
+        if line and line.replace(b"/", b"-") < cutoff:
+            lo = mid
+        else:
+            hi = mid
+    pos = lo
+    if pos > start:
+        pos = buf.find(b"\n", pos) + 1 or len(buf)
+    while pos < len(buf) and buf[pos : pos + 19].replace(b"/", b"-") < cutoff:
+        pos = buf.find(b"\n", pos) + 1 or len(buf)
+    return pos
+
+
+def _int_or_zero(v) -> int:
+    return int(v or 0)
+
+
+# Columnas de cada backup: (clave, columna CSV, conversión, valor si falta la columna)
+_TEMP_BACKUP_FIELDS = (
+    ("t", "T", float, "nan"),
+    ("sp", "SP", float, "nan"),
+    ("nut", "nutricion_activa", _int_or_zero, "0"),
+)
+_CO2_BACKUP_FIELDS = (("flow", "flow_sccm", float, "nan"),)
+
+
+_NAIVE_EPOCH = dt.datetime(1970, 1, 1)
+_HOUR_LAST_SEC = dt.timedelta(seconds=3599)
+
+
+def _parse_backup_chunk_pandas(pd, data: bytes, ts_i, ferm_i, cols, since, all_series):
+    # Mismo resultado que el bucle con csv.reader, pero con el parser en C de pandas.
+    # Los valores no numéricos quedan en NaN (float) o 0 (enteros) en vez de descartar la fila.
+    use = sorted({ts_i, *(i for _, i, *_ in cols if i is not None)} | ({ferm_i} if ferm_i is not None else set()))
+    dtypes = {ts_i: str}
+    if ferm_i is not None:
+        dtypes[ferm_i] = "category"
+    df = pd.read_csv(
+        io.BytesIO(data),
+        header=None,
+        usecols=use,
+        dtype=dtypes,
+        skipinitialspace=True,
+        on_bad_lines="skip",
+        encoding_errors="replace",
+    )
+    if df.empty:
+        return
+    ts_raw = df[ts_i]
+    if ts_raw.str.contains("/", regex=False).any():
+        ts_raw = ts_raw.str.replace("/", "-", regex=False)
+    ts = pd.to_datetime(ts_raw, format="ISO8601", errors="coerce")
+    keep = ts.notna() & (ts >= since)
+    if not keep.any():
+        return
+    df, ts = df[keep], ts[keep]
+    # Hora local -> epoch con el desfase de cada hora del bloque (igual que datetime.timestamp()
+    # fila a fila). Las horas que contienen un cambio de horario se convierten fila a fila.
+    _numpy()
+    naive = ((ts - pd.Timestamp(0)) / pd.Timedelta(seconds=1)).to_numpy()
+    codes, hours = pd.factorize(ts.dt.floor("h"))
+    offsets = np.empty(len(hours))
+    for k, h in enumerate(hours):
+        h = h.to_pydatetime()
+        n0 = (h - _NAIVE_EPOCH).total_seconds()
+        off = h.timestamp() - n0
+        if (h + _HOUR_LAST_SEC).timestamp() - (n0 + 3599.0) != off:
+            off = math.nan
+        offsets[k] = off
+    epoch = naive + offsets[codes]
+    mixed = np.isnan(epoch)
+    if mixed.any():
+        epoch[mixed] = [x.timestamp() for x in ts[mixed].dt.to_pydatetime()]
+    epoch = pd.Series(epoch, index=ts.index)
+    if ferm_i is not None:
+        ferms = df[ferm_i].astype(str).str.strip().replace({"": "?", "nan": "?"})
+    else:
+        ferms = pd.Series("?", index=df.index)
+    values = {}
+    for key, i, conv, default in cols:
+        if i is None:
+            values[key] = None
+            continue
+        col = df[i] if df[i].dtype.kind in "fi" else pd.to_numeric(df[i], errors="coerce")
+        values[key] = col.astype(float) if conv is float else col.fillna(0).astype(int)
+    for ferm, idx in ferms.groupby(ferms, sort=False).groups.items():
+        series = all_series.get(ferm)
+        if series is None:
+            series = all_series[ferm] = {"ts": [], **{key: [] for key, *_ in cols}}
+        series["ts"].extend(epoch.loc[idx].tolist())
+        for key, *_, default in cols:
+            col = values[key]
+            series[key].extend(col.loc[idx].tolist() if col is not None else [default] * len(idx))
+
+
+def _parse_backup_rows(data: bytes, layout, since, all_series):
+    # Filas completas del backup (bytes) con ts >= since, agregadas a all_series por fermentador.
+    # layout = (índice timestamp, índice fermentador, columnas) resuelto desde el encabezado
+    ts_i, ferm_i, cols = layout
+    if len(data) >= CSV_PANDAS_MIN_BYTES and _pandas() is not None:
+        _parse_backup_chunk_pandas(pd, data, ts_i, ferm_i, cols, since, all_series)
+        return
+
+    since_str = now_str(since)
+    since_ts = since.timestamp()
+    fromiso = dt.datetime.fromisoformat
+    for row in csv.reader(data.decode("utf-8", errors="replace").splitlines()):
+        n = len(row)
+        try:
+            ts_raw = row[ts_i].strip().replace("/", "-", 2)
+            # Filtro por texto antes de parsear (formato ISO con ceros: orden lexicográfico = cronológico)
+            if ts_raw < since_str:
+                continue
+            ts = fromiso(ts_raw).timestamp()
+            vals = [conv(row[i]) if i is not None and i < n else default for _, i, conv, default in cols]
+        except (ValueError, IndexError):
+            continue
+        if ts < since_ts:
+            continue
+        ferm = (row[ferm_i].strip() if ferm_i is not None and ferm_i < n else "") or "?"
+        series = all_series.get(ferm)
+        if series is None:
+            series = all_series[ferm] = {"ts": [], **{key: [] for key, *_ in cols}}
+        series["ts"].append(ts)
+        for (key, *_), v in zip(cols, vals):
+            series[key].append(v)
+
+
+# ===== Escritura CSV en segundo plano =====
+# Un lote por archivo se escribe al juntar CSV_BATCH_ROWS filas o a los CSV_FLUSH_SEC
+# segundos de la primera fila pendiente (exportar/borrar/cerrar escriben antes lo pendiente)
+CSV_FLUSH_SEC = 5.0
+CSV_BATCH_ROWS = 60
+# Archivos sin filas nuevas durante este tiempo se cierran (p. ej. tras cambiar el nombre del CSV)
+CSV_IDLE_CLOSE_SEC = 300.0
+
+
+class AsyncCsvWriter:
+    # Escribe filas CSV desde un hilo propio: cada archivo queda abierto
+    # (buffer de 64 KB) y las filas se escriben en lotes con writerows cada
+    # CSV_BATCH_ROWS filas del mismo archivo o flush_sec segundos, lo que ocurra primero.
+    # Una fila puede ser una secuencia (pasa por csv.writer) o una línea str ya formateada
+    # con "\r\n" final, para campos que nunca llevan comas ni comillas.
+    def __init__(self, flush_sec: float = CSV_FLUSH_SEC):
+        self._q = queue.SimpleQueue()
+        self._flush_sec = flush_sec
+        self._files = {}  # path -> (archivo, csv.writer)
+        self._last_write = {}  # path -> time.monotonic() del último lote
+        self._errors = {}  # path -> último error de escritura (se borra al recuperarse)
+        self._thread = threading.Thread(target=self._run, name="csv-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, path: str, fieldnames, row):
+        self._q.put((path, fieldnames, row))
+
+    def error(self, path: str):
+        return self._errors.get(path)
+
+    def release(self, path: str, timeout: float = 2.0):
+        # Escribe lo pendiente y cierra el archivo (antes de exportarlo o borrarlo).
+        # Con timeout=0 solo se encola el cierre, sin esperar.
+        if not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._q.put((path, None, done))
+        done.wait(timeout)
+
+    def stop(self, timeout: float = 5.0):
+        if self._thread.is_alive():
+            self._q.put(None)
+            self._thread.join(timeout)
+
+    def _open(self, path: str, fieldnames):
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        f = open(path, "a", newline="", encoding="utf-8", buffering=1 << 16)
+        w = csv.writer(f)
+        if f.tell() == 0:
+            w.writerow(fieldnames)
+        self._files[path] = (f, w)
+        return w
+
+    def _close(self, path: str):
+        self._last_write.pop(path, None)
+        entry = self._files.pop(path, None)
+        if entry is None:
+            return
+        try:
+            entry[0].close()
+        except Exception as e:
+            print(f"[CSV] No se pudo cerrar {path}: {e}")
+
+    def _write(self, path: str, fieldnames, rows: list):
+        # Un writerows (o un solo write si son líneas ya armadas) + flush por archivo y por lote
+        try:
+            entry = self._files.get(path)
+            if entry is None:
+                self._open(path, fieldnames)
+                entry = self._files[path]
+            f, w = entry
+            n_str = sum(type(row) is str for row in rows)
+            if n_str == 0:
+                w.writerows(rows)
+            elif n_str == len(rows):
+                f.write("".join(rows))
+            else:
+                # Lote mezclado (mismo archivo elegido para dos CSV): se respeta el orden
+                for row in rows:
+                    if type(row) is str:
+                        f.write(row)
+                    else:
+                        w.writerow(row)
+            f.flush()
+            self._last_write[path] = time.monotonic()
+        except Exception as e:
+            # Se informa una vez por transición, no en cada lote
+            if path not in self._errors:
+                print(f"[CSV] No se pudo escribir en {path}: {e}")
+            self._errors[path] = repr(e)
+            self._close(path)
+            return
+        if self._errors.pop(path, None) is not None:
+            print(f"[CSV] Escritura recuperada en {path}")
+
+    def _run(self):
+        pending = {}  # path -> (fieldnames, [filas])
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._q.get(timeout=timeout)
+            except queue.Empty:
+                item = ()
+            if item is None:
+                for path, (fieldnames, rows) in pending.items():
+                    self._write(path, fieldnames, rows)
+                for path in list(self._files):
+                    self._close(path)
+                return
+            if item:
+                path, fieldnames, row = item
+                if fieldnames is None:
+                    batch = pending.pop(path, None)
+                    if batch is not None:
+                        self._write(path, *batch)
+                    self._close(path)
+                    row.set()
+                    continue
+                rows = pending.setdefault(path, (fieldnames, []))[1]
+                rows.append(row)
+                if len(rows) >= CSV_BATCH_ROWS:
+                    self._write(path, *pending.pop(path))
+                elif deadline is None:
+                    deadline = time.monotonic() + self._flush_sec
+            if deadline is not None and time.monotonic() >= deadline:
+                for path, (fieldnames, rows) in pending.items():
+                    self._write(path, fieldnames, rows)
+                pending.clear()
+                deadline = None
+                idle = time.monotonic() - CSV_IDLE_CLOSE_SEC
+                for path in [p for p, t in self._last_write.items() if t < idle]:
+                    self._close(path)
+
+
+_CSV_WRITER = AsyncCsvWriter()
+atexit.register(_CSV_WRITER.stop)
+
+
 def voltage_to_current_ma(voltage: float, shunt_ohms: float) -> float:
     return (voltage / shunt_ohms) * 1000.0
 
 
-def current_to_flow_sccm(current_ma: float) -> float:
-    if FLOW_MAX_SCCM <= FLOW_MIN_SCCM:
+def _make_flow_converter(k: float, b: float):
+    def current_to_flow_sccm(current_ma: float) -> float:
+        return (max(4.0, min(20.0, current_ma)) - 4.0) * k + b
+
+    return current_to_flow_sccm
+
+
+# El rango de caudal no cambia en ejecución: se elige la conversión una sola vez.
+if _FLOW_SPAN_PER_MA > 0.0:
+    current_to_flow_sccm = _make_flow_converter(_FLOW_SPAN_PER_MA, FLOW_MIN_SCCM)
+else:
+
+    def current_to_flow_sccm(current_ma: float) -> float:
         return 0.0
-    current_ma = max(4.0, min(20.0, current_ma))
-    span = 16.0
-    return FLOW_MIN_SCCM + (current_ma - 4.0) * (FLOW_MAX_SCCM - FLOW_MIN_SCCM) / span
+
+
+# Estado del lazo 4-20 mA indexado por (I < 3.8) + 2 * (I > 20.5), sin cadena de if/elif
+_FLOW_STATUS = ("OK", "Bajo rango", "Alto rango")
 
 
 def flow_to_rate_g_l_h(flow_sccm: float) -> float:
-    if CO2_DENSITY_G_M3 <= 0 or BROTH_VOLUME_L <= 0:
-        return 0.0
-    flow_m3h = flow_sccm * 6e-5
-    return (flow_m3h * CO2_DENSITY_G_M3) / BROTH_VOLUME_L
+    return flow_sccm * _RATE_K
 
 
 # ===== Hardware layer (con fallback simulador) =====
@@ -169,7 +557,15 @@ class Hardware:
         self.pwms = {}
         self._last_temp_error = False
         self._sim_bias = [random.uniform(-1, 1) for _ in range(3)]
-        self.ds_devices = []
+        self._ds_devices = ()
+        self._ds_paths = []
+        self._ds_bufs = []
+        self._bulk_ok = False
+        self._bulk_t0 = None
+        self._pool = None
+        self._poll_thread = None
+        self._poll_stop = threading.Event()
+        self.latest_temps = []
 
         if not self.sim:
             try:
@@ -185,12 +581,21 @@ class Hardware:
                 self.gpio = None
 
             # Buscamos los DS18B20, pero NO forzamos simulador si no hay
-            self.ds_devices = sorted(glob.glob("/sys/bus/w1/devices/28-*"))
+            self._ds_devices = self._scan_ds18b20()
             if len(self.ds_devices) < 1:
                 print(
                     "[HW] Advertencia: no se encontraron DS18B20, "
                     "se usará 20°C de respaldo para la temperatura."
                 )
+            for dev in self.ds_devices:
+                self._set_ds_resolution(dev, DS18B20_RESOLUTION)
+                temp_path = os.path.join(dev, "temperature")
+                if os.path.exists(temp_path):
+                    self._ds_paths.append((temp_path, False))
+                else:
+                    self._ds_paths.append((os.path.join(dev, "w1_slave"), True))
+                self._ds_bufs.append(bytearray(W1_READ_SIZE))
+            self._bulk_ok = bool(self.ds_devices) and os.path.exists(W1_BULK_READ)
 
         if self.sim:
             print(f"[HW] Modo simulador activo. {self.sim_reason}")
@@ -201,6 +606,19 @@ class Hardware:
                 print("[HW] GPIO activo.")
             print("[HW] Modo hardware activo. Sensores detectados:", self.ds_devices)
 
+    @property
+    def ds_devices(self) -> tuple:
+        return self._ds_devices
+
+    @staticmethod
+    def _scan_ds18b20() -> tuple:
+        # Enumeración única del bus 1-Wire (familia 0x28 = DS18B20)
+        try:
+            with os.scandir(W1_DEVICES_DIR) as it:
+                return tuple(sorted(e.path for e in it if e.name.startswith("28-")))
+        except OSError:
+            return ()
+
     def _gpio_fallback(self, exc: Exception):
         if self.sim_gpio:
             return
@@ -211,6 +629,39 @@ class Hardware:
         print(f"[HW] {self.sim_gpio_reason}")
 
     # --- DS18B20 ---
+    def _set_ds_resolution(self, dev: str, bits: int):
+        try:
+            with open(os.path.join(dev, "resolution"), "w") as f:
+                f.write(str(bits))
+        except Exception as e:
+            print(f"[HW] No se pudo fijar resolución {bits} bits en {dev}: {e}")
+
+    def trigger_bulk_convert(self) -> bool:
+        # Convert T simultáneo en todo el bus; retorna sin esperar la conversión.
+        if self.sim or not self._bulk_ok:
+            return False
+        try:
+            with open(W1_BULK_READ, "w") as f:
+                f.write("1")
+        except Exception as e:
+            print(f"[HW] therm_bulk_read no disponible: {e}. Se usa conversión por sensor.")
+            self._bulk_ok = False
+            self._bulk_t0 = None
+            return False
+        self._bulk_t0 = time.monotonic()
+        return True
+
+    @staticmethod
+    def _read_w1_slave(buf: bytearray, n: int) -> float:
+        nl = buf.find(b"\n", 0, n)
+        if nl < 0 or buf.find(b"YES", 0, nl) < 0:
+            raise RuntimeError("CRC inválido")
+        idx = buf.rfind(b"t=", nl, n)
+        if idx < 0:
+            raise RuntimeError("Lectura incompleta")
+        end = buf.find(b"\n", idx, n)
+        return int(buf[idx + 2 : end if end >= 0 else n]) / 1000.0
+
     def read_temp_ds18b20(self, index: int) -> float:
         if self.sim or not self.ds_devices:
             base = 20.0 + self._sim_bias[min(index, len(self._sim_bias) - 1)]
@@ -218,13 +669,22 @@ class Hardware:
         if index >= len(self.ds_devices):
             index = len(self.ds_devices) - 1
         dev = self.ds_devices[index]
+        path, is_w1_slave = self._ds_paths[index]
+        buf = self._ds_bufs[index]
         try:
-            with open(os.path.join(dev, "w1_slave"), "r") as f:
-                lines = f.readlines()
-            if len(lines) < 2 or "YES" not in lines[0]:
-                raise RuntimeError("CRC inválido")
-            temp_str = lines[1].split("t=")[-1].strip()
-            return float(temp_str) / 1000.0
+            if self._bulk_t0 is not None:
+                # Lectura del resultado de la última conversión simultánea
+                remaining = DS18B20_CONV_SEC - (time.monotonic() - self._bulk_t0)
+                if remaining > 0:
+                    time.sleep(remaining)
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                n = os.readv(fd, [buf])
+            finally:
+                os.close(fd)
+            if is_w1_slave:
+                return self._read_w1_slave(buf, n)
+            return int(buf[:n]) / 1000.0
         except Exception as e:
             if not self._last_temp_error:
                 print(f"[HW] Error leyendo {dev}: {e}. Usando 20°C de respaldo.")
@@ -233,6 +693,51 @@ class Hardware:
         finally:
             self._last_temp_error = False
 
+    def read_temps_all(self, count: int) -> list:
+        # Lee todos los sensores del tick en paralelo (una tarea por DS18B20).
+        if self.sim or not self.ds_devices:
+            temps = [self.read_temp_ds18b20(i) for i in range(count)]
+        else:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix="w1")
+            # Con menos sensores que paneles varios índices caen en el mismo dispositivo:
+            # se lee una vez por dispositivo (cada uno tiene su buffer) y se reparte a los paneles
+            last = len(self.ds_devices) - 1
+            dev_of = [min(i, last) for i in range(count)]
+            futures = {self._pool.submit(self.read_temp_ds18b20, d): d for d in set(dev_of)}
+            by_dev = {}
+            for fut in as_completed(futures):
+                by_dev[futures[fut]] = fut.result()
+            temps = [by_dev[d] for d in dev_of]
+        self.latest_temps = temps
+        return temps
+
+    def start_temp_poller(self, initial, period: float = 1.0):
+        # Hilo productor: conversión + lectura de todos los DS18B20 fuera del hilo de Tk.
+        # El loop de la GUI solo lee latest_temps (se reemplaza la lista completa).
+        self.latest_temps = list(initial)
+        if self.sim or self._poll_thread is not None:
+            return
+        self._poll_stop.clear()
+        self._poll_thread = threading.Thread(
+            target=self._temp_poll_loop, args=(len(self.latest_temps), period), name="w1-poller", daemon=True
+        )
+        self._poll_thread.start()
+
+    def _temp_poll_loop(self, count: int, period: float):
+        while not self._poll_stop.is_set():
+            t0 = time.monotonic()
+            self.trigger_bulk_convert()
+            self.read_temps_all(count)
+            self._poll_stop.wait(max(0.0, period - (time.monotonic() - t0)))
+
+    def stop_temp_poller(self, timeout: float = 2.0):
+        if self._poll_thread is None:
+            return
+        self._poll_stop.set()
+        self._poll_thread.join(timeout)
+        self._poll_thread = None
+
     # --- Relés ---
     def setup_relay(self, pin: int):
         if self.sim or self.sim_gpio or not self.gpio:
@@ -298,6 +803,10 @@ class Hardware:
             self._gpio_fallback(e)
 
     def cleanup(self):
+        self.stop_temp_poller()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
         if self.sim or self.sim_gpio or not self.gpio:
             return
         try:
@@ -307,16 +816,55 @@ class Hardware:
 
 
 # ===== ADS1115 / Caudalimetro CO2 =====
+SIM_CURVE_SECONDS = 24 * 3600
+SIM_NOISE_LEN = 4096  # potencia de 2 (índice con máscara)
+_SIM_FLOW_CURVE = None
+_SIM_NOISE = None
+
+
+def _build_flow_curve() -> array:
+    # Curva biexponencial de caudal (SCCM), un punto por segundo de simulación.
+    tr = 0.2
+    td = 4.0
+    t_peak = (tr * td / (td - tr)) * math.log(td / tr)
+    peak_shape = math.exp(-t_peak / td) - math.exp(-t_peak / tr)
+    peak_shape = peak_shape if peak_shape > 0 else 1.0
+    amplitude = FLOW_MAX_SCCM / peak_shape
+    step_d = math.exp(-1.0 / (td * 3600.0))
+    step_r = math.exp(-1.0 / (tr * 3600.0))
+    curve = array("f", bytes(4 * SIM_CURVE_SECONDS))
+    exp_d = 1.0
+    exp_r = 1.0
+    for i in range(SIM_CURVE_SECONDS):
+        curve[i] = amplitude * (exp_d - exp_r)
+        exp_d *= step_d
+        exp_r *= step_r
+    return curve
+
+
+def _sim_tables():
+    global _SIM_FLOW_CURVE, _SIM_NOISE
+    if _SIM_FLOW_CURVE is None:
+        _SIM_FLOW_CURVE = _build_flow_curve()
+        _SIM_NOISE = array("f", (random.uniform(-0.3, 0.3) for _ in range(SIM_NOISE_LEN)))
+    return _SIM_FLOW_CURVE, _SIM_NOISE
+
+
 class ADS1115Reader:
     def __init__(self, address: int, channel: int, gain: int, shunt_ohms: float):
         self.address = address
         self.channel = max(0, min(3, channel))
         self.gain = gain
         self.shunt_ohms = shunt_ohms
+        # V -> mA precalculado desde la misma fórmula (una multiplicación por muestra)
+        self.ma_per_volt = voltage_to_current_ma(1.0, shunt_ohms)
         self.sim = SIMULADOR
         self.sim_reason = ""
         self._sim_start = time.monotonic()
+        self._sim_v_per_ma = shunt_ohms / 1000.0
+        self._noise_i = random.randrange(SIM_NOISE_LEN)
         self._ads = None
+        self._ads_key = None
         self._chan = None
         self._init_hw()
 
@@ -339,8 +887,13 @@ class ADS1115Reader:
             if _ADS_I2C is None:
                 _ADS_I2C = busio.I2C(board.SCL, board.SDA)
             i2c = _ADS_I2C
-            ads = ADS.ADS1115(i2c, address=self.address)
-            ads.gain = self.gain
+            key = (self.address, self.gain)
+            entry = _ADS_DEVICES.get(key)
+            if entry is None:
+                ads = ADS.ADS1115(i2c, address=self.address)
+                ads.gain = self.gain
+                entry = _ADS_DEVICES[key] = [ads, 0]
+            ads = entry[0]
             try:
                 ch_map = [ADS.P0, ADS.P1, ADS.P2, ADS.P3]
             except AttributeError:
@@ -352,7 +905,12 @@ class ADS1115Reader:
                     ch_map = [0, 1, 2, 3]
             self._ads = ads
             self._chan = AnalogIn(ads, ch_map[self.channel])
+            entry[1] += 1
+            self._ads_key = key
         except Exception as exc:
+            entry = _ADS_DEVICES.get((self.address, self.gain))
+            if entry is not None and entry[1] <= 0:
+                _ADS_DEVICES.pop((self.address, self.gain), None)
             self.sim = True
             self.sim_reason = f"Fallback a simulador: {exc}"
             self._ads = None
@@ -360,24 +918,13 @@ class ADS1115Reader:
 
     def read_voltage(self) -> float:
         if self.sim or not self._chan:
-            t_hours = (time.monotonic() - self._sim_start) / 3600.0
-            tr = 0.2
-            td = 4.0
-            if td <= tr:
-                td = tr + 0.1
-            t_peak = (tr * td / (td - tr)) * math.log(td / tr)
-            peak_shape = math.exp(-t_peak / td) - math.exp(-t_peak / tr)
-            peak_shape = peak_shape if peak_shape > 0 else 1.0
-            amplitude = FLOW_MAX_SCCM / peak_shape
-            flow_sccm = amplitude * (math.exp(-t_hours / td) - math.exp(-t_hours / tr))
-            flow_sccm += random.uniform(-0.3, 0.3)
+            curve, noise = _sim_tables()
+            idx = int(time.monotonic() - self._sim_start)
+            flow_sccm = curve[idx] if idx < SIM_CURVE_SECONDS else curve[-1]
+            flow_sccm += noise[self._noise_i & (SIM_NOISE_LEN - 1)]
+            self._noise_i += 1
             flow_sccm = max(FLOW_MIN_SCCM, min(FLOW_MAX_SCCM, flow_sccm))
-            if FLOW_MAX_SCCM > FLOW_MIN_SCCM:
-                current_ma = 4.0 + (flow_sccm - FLOW_MIN_SCCM) * 16.0 / (FLOW_MAX_SCCM - FLOW_MIN_SCCM)
-            else:
-                current_ma = 4.0
-            current_ma = max(4.0, min(20.0, current_ma))
-            return (current_ma / 1000.0) * self.shunt_ohms
+            return (4.0 + (flow_sccm - FLOW_MIN_SCCM) * _MA_PER_SCCM) * self._sim_v_per_ma
         return float(self._chan.voltage)
 
     def probe(self):
@@ -401,6 +948,15 @@ class ADS1115Reader:
         global _ADS_I2C
         self._chan = None
         self._ads = None
+        key, self._ads_key = self._ads_key, None
+        entry = _ADS_DEVICES.get(key) if key is not None else None
+        if entry is not None:
+            entry[1] -= 1
+            if entry[1] <= 0:
+                _ADS_DEVICES.pop(key, None)
+        if _ADS_DEVICES:
+            # Otros lectores siguen usando el bus I2C
+            return
         if _ADS_I2C is not None:
             try:
                 _ADS_I2C.deinit()
@@ -409,8 +965,150 @@ class ADS1115Reader:
             _ADS_I2C = None
 
 
+# ===== Historial de caudal =====
+class FlowHistory:
+    # Anillo de capacidad fija con columnas tipadas: 12 bytes por muestra
+    # (epoch float64 + caudal float32) en vez de una tupla de objetos Python.
+    def __init__(self, capacity: int):
+        self.capacity = max(1, int(capacity))
+        self.ts = array("d")
+        self.flow = array("f")
+        self.head = 0
+        self.last = None
+
+    def __len__(self):
+        return len(self.ts)
+
+    def append(self, ts: float, flow: float):
+        if len(self.ts) < self.capacity:
+            self.ts.append(ts)
+            self.flow.append(flow)
+            return
+        self.ts[self.head] = ts
+        self.flow[self.head] = flow
+        self.head = (self.head + 1) % self.capacity
+
+    def since(self, ts0: float):
+        # Copias cronológicas de las muestras con ts >= ts0 (bisect por tramo ordenado);
+        # exponen buffer para np.frombuffer. Solo se copia la ventana pedida.
+        ts, flow = self.ts, self.flow
+        n = len(ts)
+        h = self.head
+        if h == 0:
+            i = bisect.bisect_left(ts, ts0)
+            return ts[i:], flow[i:]
+        if ts0 <= ts[n - 1]:
+            i = bisect.bisect_left(ts, ts0, h, n)
+            return ts[i:] + ts[:h], flow[i:] + flow[:h]
+        i = bisect.bisect_left(ts, ts0, 0, h)
+        return ts[i:h], flow[i:h]
+
+
+class TempHistory:
+    # Anillo de temperatura para los gráficos: epoch, T, SP y nutrición en
+    # columnas tipadas (17 bytes por muestra). Lo llena el loop de Tk; los
+    # gráficos toman copias con since() y no releen el backup CSV.
+    def __init__(self, capacity: int):
+        self.capacity = max(1, int(capacity))
+        self.clear()
+
+    def clear(self):
+        self.ts = array("d")
+        self.t = array("f")
+        self.sp = array("f")
+        self.nut = array("B")
+        self.head = 0
+
+    def __len__(self):
+        return len(self.ts)
+
+    def _columns(self):
+        return (self.ts, self.t, self.sp, self.nut)
+
+    def append(self, ts: float, t: float, sp: float, nut: int):
+        if len(self.ts) < self.capacity:
+            self.ts.append(ts)
+            self.t.append(t)
+            self.sp.append(sp)
+            self.nut.append(nut)
+            return
+        h = self.head
+        self.ts[h] = ts
+        self.t[h] = t
+        self.sp[h] = sp
+        self.nut[h] = nut
+        self.head = (h + 1) % self.capacity
+
+    def since(self, ts0: float):
+        # Copias cronológicas de las muestras con ts >= ts0 (bisect por tramo ordenado)
+        ts = self.ts
+        n = len(ts)
+        h = self.head
+        if h == 0:
+            i = bisect.bisect_left(ts, ts0)
+            return tuple(col[i:] for col in self._columns())
+        if ts0 <= ts[n - 1]:
+            i = bisect.bisect_left(ts, ts0, h, n)
+            return tuple(col[i:] + col[:h] for col in self._columns())
+        i = bisect.bisect_left(ts, ts0, 0, h)
+        return tuple(col[i:h] for col in self._columns())
+
+    def prepend(self, ts, t, sp, nut):
+        # Agrega muestras anteriores a la primera en memoria (carga inicial del backup)
+        if self.head != 0:
+            return
+        if self.ts:
+            k = bisect.bisect_left(ts, self.ts[0])
+            ts, t, sp, nut = ts[:k], t[:k], sp[:k], nut[:k]
+        cols = []
+        for old, typecode, new in zip(self._columns(), "dffB", (ts, t, sp, nut)):
+            col = array(typecode, new)
+            col.extend(old)
+            cols.append(col[-self.capacity :])
+        self.ts, self.t, self.sp, self.nut = cols
+
+
 # ===== LED widget =====
+# Agrupa cambios de config/itemconfig y los aplica en un solo after_idle
+# (si el mismo widget/opción cambia varias veces antes del flush, gana el último)
+class _UIBatch:
+    def __init__(self):
+        self._pending = {}
+        self._scheduled = False
+
+    def queue_update(self, widget, key, value, item=None):
+        self._pending[(id(widget), item, key)] = (widget, item, key, value)
+        if not self._scheduled:
+            self._scheduled = True
+            try:
+                widget.after_idle(self._flush)
+            except tk.TclError:
+                self._scheduled = False
+
+    def _flush(self):
+        pending, self._pending = self._pending, {}
+        self._scheduled = False
+        # Una sola llamada configure/itemconfig por (widget, item)
+        grouped = {}
+        for widget, item, key, value in pending.values():
+            grouped.setdefault((id(widget), item), (widget, item, {}))[2][key] = value
+        for widget, item, opts in grouped.values():
+            try:
+                if item is None:
+                    widget.configure(opts)
+                else:
+                    widget.itemconfig(item, opts)
+            except tk.TclError:
+                pass  # widget destruido antes del flush
+
+
+_UI_BATCH = _UIBatch()
+
+
 class Led:
+    ON_COLOR = "#22c55e"
+    OFF_COLOR = "#ef4444"
+
     def __init__(self, parent, size=20):
         bg = None
         for key in ("fg_color", "background", "bg"):
@@ -431,21 +1129,48 @@ class Led:
         )
         r = 2
         self.oval = self.canvas.create_oval(r, r, size - r, size - r, fill="red", outline="#111")
+        self._color = "red"
 
     def widget(self):
         return self.canvas
 
     def set_color(self, color: str):
-        self.canvas.itemconfig(self.oval, fill=color)
+        if color == self._color:
+            return
+        self._color = color
+        _UI_BATCH.queue_update(self.canvas, "fill", color, item=self.oval)
 
     def set_on(self, on: bool):
-        self.set_color("#22c55e" if on else "#ef4444")
+        color = self.ON_COLOR if on else self.OFF_COLOR
+        if color != self._color:
+            self.set_color(color)
 
 
 # ===== Calendario por FECHAS =====
 DAYS_SHORT = ["L", "Ma", "Mi", "J", "V", "S", "D"]
 
 
+# Calendario: {"YYYY-MM-DD": {"times": ["HH:MM", ...], "values": [...]}}
+# con listas paralelas ordenadas por hora.
+def _day_from_pairs(pairs) -> dict:
+    pairs = sorted(pairs, key=lambda p: p[0])
+    return {"times": [p[0] for p in pairs], "values": [p[1] for p in pairs]}
+
+
+def _calendar_soa(data: dict) -> dict:
+    # Copia un calendario; convierte el formato antiguo [{"time", "value"}, ...].
+    out = {}
+    for key, day in data.items():
+        if isinstance(day, dict):
+            pairs = zip(day.get("times", []), day.get("values", []))
+        else:
+            pairs = ((ev.get("time"), ev.get("value")) for ev in day if ev.get("time"))
+        day = _day_from_pairs(pairs)
+        if day["times"]:
+            out[key] = day
+    return out
+
+
 class DateCalendarDialog(tk.Toplevel):
     def __init__(self, master, title_label, value_label, value_type=float, initial=None, import_callback=None):
         super().__init__(master)
@@ -459,8 +1184,7 @@ class DateCalendarDialog(tk.Toplevel):
         self.data = {}
         self.import_callback = import_callback
         if isinstance(initial, dict):
-            for k, v in initial.items():
-                self.data[k] = [dict(ev) for ev in v]
+            self.data = _calendar_soa(initial)
 
         self.today = dt.date.today()
         self.selected_date = self.today
@@ -546,7 +1270,18 @@ class DateCalendarDialog(tk.Toplevel):
             "disabled_bg": "#E2E8F0",
         }
 
+        # Grilla fija 6x7: se crea una vez y refresh_calendar solo la reconfigura
         self.day_buttons = []
+        for r in range(1, 7):
+            row_btns = []
+            for c in range(7):
+                btn = tk.Button(self.cal_grid, text="", width=4, relief="raised", bd=1)
+                btn.grid(row=r, column=c, padx=2, pady=2, sticky="nsew")
+                btn._date = None
+                # command fijo (al soltar, teclado y estado disabled como siempre): la fecha la lee de btn._date
+                btn.config(command=lambda b=btn: self._on_day_click(b))
+                row_btns.append(btn)
+            self.day_buttons.append(row_btns)
         self.refresh_calendar()
         self.refresh_day_list()
 
@@ -554,55 +1289,57 @@ class DateCalendarDialog(tk.Toplevel):
         return f"{MESES_ES[self.view_month]} {self.view_year}"
 
     def refresh_calendar(self):
-        for child in list(self.cal_grid.grid_slaves()):
-            info = child.grid_info()
-            if int(info["row"]) > 0:
-                child.destroy()
-
         self.lbl_month.config(text=self.month_title())
-        self.day_buttons.clear()
 
         cal = pycal.Calendar(firstweekday=0)
         weeks = cal.monthdatescalendar(self.view_year, self.view_month)
 
-        for r, week in enumerate(weeks, start=1):
-            for c, d in enumerate(week):
-                btn = tk.Button(
-                    self.cal_grid,
-                    text=str(d.day),
-                    width=4,
-                    relief="raised",
-                    bd=1,
-                    command=lambda dd=d: self.select_date(dd),
-                )
-                btn.grid(row=r, column=c, padx=2, pady=2, sticky="nsew")
-
+        for r, row_btns in enumerate(self.day_buttons):
+            week = weeks[r] if r < len(weeks) else None
+            for c, btn in enumerate(row_btns):
+                if week is None:
+                    btn.config(
+                        text="",
+                        state="disabled",
+                        relief="flat",
+                        bg=self.styles["normal_bg"],
+                        activebackground=self.styles["normal_bg"],
+                    )
+                    btn._date = None
+                    continue
+                d = week[c]
                 is_other_month = d.month != self.view_month
                 is_past = d < self.today
-                has_ev = ymd(d) in self.data and len(self.data[ymd(d)]) > 0
+                has_ev = ymd(d) in self.data
                 is_today = d == self.today
 
                 if is_past:
-                    btn.config(
-                        state="disabled",
-                        bg=self.styles["disabled_bg"],
-                        activebackground=self.styles["disabled_bg"],
-                    )
+                    state = "disabled"
+                    bg = self.styles["disabled_bg"]
                 else:
+                    state = "normal"
                     bg = self.styles["other_bg"] if is_other_month else self.styles["normal_bg"]
                     if has_ev:
                         bg = self.styles["has_bg"]
                     if is_today:
                         bg = self.styles["today_bg"] if not has_ev else "#9AE6B4"
-                    btn.config(bg=bg, activebackground=bg)
-
-                if d == self.selected_date:
-                    btn.config(relief="sunken")
 
-                self.day_buttons.append((btn, d))
+                btn.config(
+                    text=str(d.day),
+                    state=state,
+                    relief="sunken" if d == self.selected_date else "raised",
+                    bg=bg,
+                    activebackground=bg,
+                )
+                btn._date = d
 
         self.lbl_sel.config(text=ymd(self.selected_date))
 
+    def _on_day_click(self, btn):
+        date_obj = btn._date
+        if date_obj is not None:
+            self.select_date(date_obj)
+
     def select_date(self, date_obj: dt.date):
         if date_obj < self.today:
             return
@@ -630,9 +1367,11 @@ class DateCalendarDialog(tk.Toplevel):
 
     def refresh_day_list(self):
         self.listbox.delete(0, tk.END)
-        flist = self.data.get(ymd(self.selected_date), [])
-        for it in sorted(flist, key=lambda x: x["time"]):
-            self.listbox.insert(tk.END, f"{it['time']}  •  {it['value']}")
+        day = self.data.get(ymd(self.selected_date))
+        if not day:
+            return
+        for t, val in zip(day["times"], day["values"]):
+            self.listbox.insert(tk.END, f"{t}  •  {val}")
 
     def _sel_index(self):
         sel = self.listbox.curselection()
@@ -652,7 +1391,10 @@ class DateCalendarDialog(tk.Toplevel):
             messagebox.showerror("Calendario", "Valor inválido.")
             return
         key = ymd(self.selected_date)
-        self.data.setdefault(key, []).append({"time": t, "value": val})
+        day = self.data.setdefault(key, {"times": [], "values": []})
+        pos = bisect.bisect_right(day["times"], t)
+        day["times"].insert(pos, t)
+        day["values"].insert(pos, val)
         self.refresh_day_list()
         self.refresh_calendar()
 
@@ -661,8 +1403,8 @@ class DateCalendarDialog(tk.Toplevel):
         if idx is None:
             return
         key = ymd(self.selected_date)
-        flist = sorted(self.data.get(key, []), key=lambda x: x["time"])
-        if not flist:
+        day = self.data.get(key)
+        if not day:
             return
         t = self.time_var.get().strip()
         if not hhmm_ok(t):
@@ -673,9 +1415,11 @@ class DateCalendarDialog(tk.Toplevel):
         except Exception:
             messagebox.showerror("Calendario", "Valor inválido.")
             return
-        old = flist[idx]
-        orig = self.data[key].index(old)
-        self.data[key][orig] = {"time": t, "value": val}
+        del day["times"][idx]
+        del day["values"][idx]
+        pos = bisect.bisect_right(day["times"], t)
+        day["times"].insert(pos, t)
+        day["values"].insert(pos, val)
         self.refresh_day_list()
         self.refresh_calendar()
 
@@ -684,11 +1428,12 @@ class DateCalendarDialog(tk.Toplevel):
         if idx is None:
             return
         key = ymd(self.selected_date)
-        flist = sorted(self.data.get(key, []), key=lambda x: x["time"])
-        if not flist:
+        day = self.data.get(key)
+        if not day:
             return
-        self.data[key].remove(flist[idx])
-        if not self.data[key]:
+        del day["times"][idx]
+        del day["values"][idx]
+        if not day["times"]:
             del self.data[key]
         self.refresh_day_list()
         self.refresh_calendar()
@@ -706,7 +1451,7 @@ class DateCalendarDialog(tk.Toplevel):
             return
         data = self.import_callback()
         if data:
-            self.data = data
+            self.data = _calendar_soa(data)
             self.refresh_day_list()
             self.refresh_calendar()
 
@@ -724,27 +1469,27 @@ class DateCalendarDialog(tk.Toplevel):
 def sp_from_date_calendar(events_dict: dict | None, t: dt.datetime, default=None):
     if not events_dict:
         return default
-    key = ymd(t.date())
-    flist = events_dict.get(key, [])
-    if not flist:
+    day = events_dict.get(ymd(t.date()))
+    if not day:
         return default
-    hhmm_now = t.strftime("%H:%M")
-    todays = [e for e in flist if e.get("time") and e["time"] <= hhmm_now]
-    if not todays:
+    hhmm_now = f"{t.hour:02d}:{t.minute:02d}"
+    idx = bisect.bisect_right(day["times"], hhmm_now)
+    if idx == 0:
         return default
-    todays = sorted(todays, key=lambda e: e["time"])
-    return todays[-1].get("value", default)
+    return day["values"][idx - 1]
 
 
 def nut_fire_for_minute(events_dict: dict | None, t: dt.datetime):
     if not events_dict:
         return []
-    key = ymd(t.date())
-    flist = events_dict.get(key, [])
-    if not flist:
+    day = events_dict.get(ymd(t.date()))
+    if not day:
         return []
-    hhmm_now = t.strftime("%H:%M")
-    return [e.get("value") for e in flist if e.get("time") == hhmm_now]
+    hhmm_now = f"{t.hour:02d}:{t.minute:02d}"
+    times = day["times"]
+    lo = bisect.bisect_left(times, hhmm_now)
+    hi = bisect.bisect_right(times, hhmm_now, lo=lo)
+    return day["values"][lo:hi]
 
 
 def _events_from_rows(rows, value_type=float):
@@ -766,8 +1511,41 @@ def _events_from_rows(rows, value_type=float):
         except Exception:
             continue
         key = ymd(date_obj)
-        events.setdefault(key, []).append({"time": hhmm, "value": val})
-    return events
+        events.setdefault(key, []).append((hhmm, val))
+    return {key: _day_from_pairs(pairs) for key, pairs in events.items()}
+
+
+def _events_from_frame(df, value_type=float):
+    # Variante columnar de _events_from_rows para DataFrames (Excel).
+    import pandas as pd  # type: ignore
+
+    rename = {}
+    for canon, aliases in (
+        ("date", ("date", "fecha", "dia", "d")),
+        ("time", ("time", "hora", "t")),
+        ("value", ("value", "valor", "v")),
+    ):
+        col = next((a for a in aliases if a in df.columns), None)
+        if col is None:
+            return {}
+        rename[col] = canon
+    df = df[list(rename)].rename(columns=rename).dropna(subset=["date", "time", "value"])
+    if pd.api.types.is_datetime64_any_dtype(df["date"]):
+        dates = df["date"].dt.date
+    else:
+        dates = df["date"].astype(str).map(_normalize_date)
+    times = df["time"].astype(str).str.strip()
+
+    events = {}
+    for date_obj, hhmm, val_raw in zip(dates, times, df["value"]):
+        if not date_obj or not hhmm_ok(hhmm):
+            continue
+        try:
+            val = value_type(val_raw)
+        except Exception:
+            continue
+        events.setdefault(ymd(date_obj), []).append((hhmm, val))
+    return {key: _day_from_pairs(pairs) for key, pairs in events.items()}
 
 
 def _load_calendar_file(path: str, value_type=float):
@@ -777,14 +1555,12 @@ def _load_calendar_file(path: str, value_type=float):
             rows = list(csv.DictReader(f))
         return _events_from_rows(rows, value_type=value_type)
     if ext in {".xlsx", ".xls"}:
-        pd_spec = importlib_util.find_spec("pandas")
-        if not pd_spec:
+        if not _has_module("pandas"):
             raise RuntimeError("Necesitas instalar pandas para leer archivos de Excel (.xlsx/.xls)")
         import pandas as pd  # type: ignore
 
         df = pd.read_excel(path)
-        rows = df.to_dict(orient="records")
-        return _events_from_rows(rows, value_type=value_type)
+        return _events_from_frame(df, value_type=value_type)
     raise RuntimeError("Formato no soportado. Usa CSV o Excel.")
 
 # ------------------------------------------------------------
@@ -801,10 +1577,8 @@ class ScrollableFrame(ttk.Frame):
         self.vsb = ttk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
         self.inner = ttk.Frame(self.canvas)
 
-        self.inner.bind(
-            "<Configure>",
-            lambda _e: self.canvas.configure(scrollregion=self.canvas.bbox("all")),
-        )
+        self._sr_pending = False
+        self.inner.bind("<Configure>", lambda _e: self._schedule_scrollregion())
         self._window_id = self.canvas.create_window((0, 0), window=self.inner, anchor="nw")
 
         self.canvas.configure(yscrollcommand=self.vsb.set)
@@ -814,6 +1588,17 @@ class ScrollableFrame(ttk.Frame):
 
         self.canvas.bind("<Configure>", self._on_canvas_configure)
 
+    def _schedule_scrollregion(self):
+        # Un solo recálculo de scrollregion por ciclo idle, aunque haya muchos <Configure>.
+        if self._sr_pending:
+            return
+        self._sr_pending = True
+        self.after_idle(self._apply_scrollregion)
+
+    def _apply_scrollregion(self):
+        self._sr_pending = False
+        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+
     def _on_canvas_configure(self, event):
         # Asegura que el frame interno ocupe el ancho del canvas.
         self.canvas.itemconfigure(self._window_id, width=event.width)
@@ -825,32 +1610,58 @@ class ScrollableFrame(ttk.Frame):
 
 
 class LightFermenterPanel(ttk.Frame):
+    _CSV_FIELDS = (
+        "timestamp",
+        "fermentador",
+        "T",
+        "SP",
+        "banda",
+        "cold",
+        "hot",
+        "nutricion_activa",
+        "freq_nut",
+    )
+
     def __init__(self, parent, app, name, hw: Hardware, backup_path_getter):
         super().__init__(parent, padding=8)
         self.app = app
         self.name = name
         self.hw = hw
         self.get_backup_path = backup_path_getter
+        self._sensor_index = int(self.name[1:]) - 1
 
         if self.hw.sim:
             self.t = 21.5 + random.uniform(-0.3, 0.3)
             self._sim_ambient = 21.0 + random.uniform(-0.4, 0.4)
+            self._sim_floor = self._sim_ambient + 4.0
         else:
-            self.t = self.hw.read_temp_ds18b20(index=int(self.name[1:]) - 1)
+            self.t = self.hw.read_temp_ds18b20(index=self._sensor_index)
             self._sim_ambient = None
         self._last_update = now()
 
-        self.t_str = tk.StringVar(value=f"{self.t:.1f}")
-        self.flow_str = tk.StringVar(value="-- SCCM")
+        self._last_t_str = f"{self.t:.1f}"
+        self._last_flow_str = "-- SCCM"
+        self._last_flow_sample = None
+        self.t_str = tk.StringVar(value=self._last_t_str)
+        self.flow_str = tk.StringVar(value=self._last_flow_str)
         self.sp = tk.DoubleVar(value=20.0)
         self.band = tk.DoubleVar(value=0.5)
+        # Copias float de sp/band/freq_nut para el loop (evita ida y vuelta a Tcl)
+        self._sp_val = 20.0
+        self._band_val = 0.5
+        self._freq_val = 1000.0
         self.manual_mode = tk.BooleanVar(value=False)
 
         self.cold_in = False
         self.hot_in = False
+        self._last_cold_cmd = None
+        self._last_hot_cmd = None
 
         self.cal_sp = {}
         self.cal_nut = {}
+        self._sp_cal = None
+        self._sp_cal_min = None
+        self._sp_cal_src = None
 
         self.nut_running_until = None
         self._nut_led_on = False
@@ -861,12 +1672,12 @@ class LightFermenterPanel(ttk.Frame):
         self.freq_entry = tk.StringVar(value=f"{self.freq_nut.get():.1f}")
         self.manual_nut_on = False
 
-        self.csv_dir = tk.StringVar(value=os.path.abspath("./Proceso"))
+        self.csv_dir = tk.StringVar(value=_PROCESO_DIR)
         self.csv_name = tk.StringVar(value=f"Temp_{self.name}.csv")
         self._csv_running = False
         self._csv_paused = False
         self._csv_last_export_ok = False
-        os.makedirs(self.csv_dir.get(), exist_ok=True)
+        self._csv_error = None
 
         rel = RELAY_PINS[self.name]
         self.relay_cold = rel["cold"]
@@ -1087,6 +1898,7 @@ class LightFermenterPanel(ttk.Frame):
         if value is None:
             return
         self.sp.set(value)
+        self._sp_val = value
         self.sp_entry.set(f"{value:.1f}")
 
     def apply_band(self):
@@ -1095,6 +1907,7 @@ class LightFermenterPanel(ttk.Frame):
         if value is None:
             return
         self.band.set(value)
+        self._band_val = value
         self.band_entry.set(f"{value:.2f}")
 
     def apply_freq(self):
@@ -1103,6 +1916,7 @@ class LightFermenterPanel(ttk.Frame):
         if value is None:
             return
         self.freq_nut.set(value)
+        self._freq_val = value
         self.freq_entry.set(f"{value:.1f}")
 
     def forzar_frio(self):
@@ -1128,6 +1942,7 @@ class LightFermenterPanel(ttk.Frame):
         self._sync_leds()
 
     def stop_all(self):
+        self.app._csv_writer.release(self._csv_path(), timeout=0)
         self.manual_mode.set(True)
         self.cold_in = False
         self.hot_in = False
@@ -1139,14 +1954,19 @@ class LightFermenterPanel(ttk.Frame):
         self._update_manual_nut_button()
 
     def _apply_relays(self):
-        if self.cold_in:
-            self.hw.relay_on(self.relay_cold)
-        else:
-            self.hw.relay_off(self.relay_cold)
-        if self.hot_in:
-            self.hw.relay_on(self.relay_hot)
-        else:
-            self.hw.relay_off(self.relay_hot)
+        # Solo se conmuta el GPIO cuando cambia el estado pedido
+        if self.cold_in != self._last_cold_cmd:
+            if self.cold_in:
+                self.hw.relay_on(self.relay_cold)
+            else:
+                self.hw.relay_off(self.relay_cold)
+            self._last_cold_cmd = self.cold_in
+        if self.hot_in != self._last_hot_cmd:
+            if self.hot_in:
+                self.hw.relay_on(self.relay_hot)
+            else:
+                self.hw.relay_off(self.relay_hot)
+            self._last_hot_cmd = self.hot_in
 
     def toggle_manual_nut(self):
         self.manual_nut_on = not self.manual_nut_on
@@ -1206,7 +2026,7 @@ class LightFermenterPanel(ttk.Frame):
 
     def _apply_nutricion_state(self, should_run: bool):
         if should_run and not self._nut_led_on:
-            self.hw.start_stepper(self.stepper_name, self.freq_nut.get())
+            self.hw.start_stepper(self.stepper_name, self._freq_val)
         elif not should_run and self._nut_led_on:
             self.hw.stop_stepper(self.stepper_name)
         self._nut_led_on = should_run
@@ -1230,6 +2050,15 @@ class LightFermenterPanel(ttk.Frame):
         self.led_csv.set_color(color)
 
     def csv_start(self):
+        path = self._csv_path()
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "a", encoding="utf-8"):
+                pass
+        except OSError as e:
+            messagebox.showerror("CSV", f"No se puede escribir en:\n{path}\n{e}")
+            return
+        self._csv_error = None
         self._csv_running = True
         self._csv_paused = False
         self._csv_last_export_ok = False
@@ -1238,6 +2067,7 @@ class LightFermenterPanel(ttk.Frame):
     def csv_pause(self):
         self._csv_running = False
         self._csv_paused = True
+        self.app._csv_writer.release(self._csv_path(), timeout=0)
         self._csv_state_led("#eab308")
 
     def csv_export(self):
@@ -1245,6 +2075,7 @@ class LightFermenterPanel(ttk.Frame):
             messagebox.showerror("Exportar", "Detén o pausa el CSV antes de exportar.")
             return
         src = self._csv_path()
+        self.app._csv_writer.release(src)
         if not os.path.exists(src):
             messagebox.showerror("Exportar", f"No existe {src}")
             return
@@ -1254,8 +2085,7 @@ class LightFermenterPanel(ttk.Frame):
             return
         try:
             dst = os.path.join(dst_dir, os.path.basename(src))
-            with open(src, "r", encoding="utf-8") as fsrc, open(dst, "w", encoding="utf-8", newline="") as fdst:
-                fdst.write(fsrc.read())
+            shutil.copyfile(src, dst)
             self._csv_last_export_ok = True
             self._csv_state_led("#3b82f6")
             messagebox.showinfo("Exportar", f"Archivo exportado a:\n{dst}")
@@ -1266,6 +2096,7 @@ class LightFermenterPanel(ttk.Frame):
         self._csv_running = False
         self._csv_paused = False
         path = self._csv_path()
+        self.app._csv_writer.release(path)
         try:
             if os.path.exists(path):
                 os.remove(path)
@@ -1274,101 +2105,93 @@ class LightFermenterPanel(ttk.Frame):
         except Exception as e:
             messagebox.showerror("CSV", f"No se pudo reiniciar.\n{e}")
 
-    def _csv_write_row(self):
-        row = {
-            "timestamp": now_str(),
-            "fermentador": self.name,
-            "T": f"{self.t:.1f}",
-            "SP": f"{float(self.sp.get()):.2f}",
-            "banda": f"{float(self.band.get()):.2f}",
-            "cold": int(self.cold_in),
-            "hot": int(self.hot_in),
-            "nutricion_activa": int(self._nut_led_on),
-            "freq_nut": f"{float(self.freq_nut.get()):.1f}",
-        }
+    def _csv_write_row(self, stamp=None, tnow=None):
+        # tnow/stamp son los del tick: el historial en memoria usa el mismo segundo que la fila
+        if tnow is None:
+            tnow = now()
+        if stamp is None:
+            stamp = now_str(tnow)
+        row = (
+            stamp,
+            self.name,
+            f"{self.t:.1f}",
+            f"{self._sp_val:.2f}",
+            f"{self._band_val:.2f}",
+            int(self.cold_in),
+            int(self.hot_in),
+            int(self._nut_led_on),
+            f"{self._freq_val:.1f}",
+        )
 
+        writer = self.app._csv_writer
         if self._csv_running:
-            ipath = self._csv_path()
-            cabe = not os.path.exists(ipath)
-            try:
-                os.makedirs(os.path.dirname(ipath), exist_ok=True)
-                with open(ipath, "a", newline="", encoding="utf-8") as f:
-                    w = csv.DictWriter(f, fieldnames=list(row.keys()))
-                    if cabe:
-                        w.writeheader()
-                    w.writerow(row)
-            except Exception as e:
-                messagebox.showerror("CSV", f"No se pudo escribir en {ipath}\n{e}")
-
-        bpath = self.get_backup_path()
-        bdir = os.path.dirname(bpath) or "."
-        os.makedirs(bdir, exist_ok=True)
-
-        backup_fields = [
-            "timestamp",
-            "fermentador",
-            "T",
-            "SP",
-            "banda",
-            "cold",
-            "hot",
-            "nutricion_activa",
-            "freq_nut",
-        ]
-        write_header = not os.path.exists(bpath) or os.path.getsize(bpath) == 0
-
-        try:
-            with open(bpath, "a", newline="", encoding="utf-8") as f:
-                w = csv.DictWriter(f, fieldnames=backup_fields, extrasaction="ignore")
-                if write_header:
-                    w.writeheader()
-                w.writerow(row)
-        except Exception as e:
-            messagebox.showerror("Backup global", f"No se pudo escribir en {bpath}\n{e}")
+            path = self._csv_path()
+            writer.submit(path, self._CSV_FIELDS, row)
+            # Errores del hilo writer: solo cambia el LED (sin diálogos en cada tick)
+            err = writer.error(path)
+            if err != self._csv_error:
+                self._csv_error = err
+                self._csv_state_led("#ef4444" if err else "#22c55e")
+
+        writer.submit(self.get_backup_path(), self._CSV_FIELDS, row)
+        ts = tnow.replace(microsecond=0).timestamp()
+        self.app.temp_history[self.name].append(ts, self.t, self._sp_val, 1 if self._nut_led_on else 0)
 
     # ----------------- Simulación de temperatura -----------------
     def _simulate_temp(self, dt_seconds: float):
         if dt_seconds <= 0:
             return
 
-        sp_obj = float(self.sp.get())
-
-        ambient_pull = (self._sim_ambient - self.t) * 0.0008
-        ferment_target = max(sp_obj, self._sim_ambient + 4.0)
-        ferment_heat = (ferment_target - self.t) * 0.018
+        t = self.t
+        sp_obj = self._sp_val
+        ferment_target = sp_obj if sp_obj > self._sim_floor else self._sim_floor
 
-        heating = 0.22 if self.hot_in else 0.0
-        cooling = -0.28 if self.cold_in else 0.0
-
-        ruido = random.uniform(-0.008, 0.008)
-        delta = (ambient_pull + ferment_heat + heating + cooling + ruido) * dt_seconds
-        self.t = max(-5.0, min(40.0, self.t + delta))
+        # tirón ambiente + calor de fermentación + relés + ruido uniforme ±0.008
+        rate = (self._sim_ambient - t) * 0.0008 + (ferment_target - t) * 0.018 + (random.random() - 0.5) * 0.016
+        if self.hot_in:
+            rate += 0.22
+        if self.cold_in:
+            rate -= 0.28
+        t += rate * dt_seconds
+        self.t = -5.0 if t < -5.0 else (40.0 if t > 40.0 else t)
 
     # ----------------- Loop del proceso -----------------
-    def update_process(self):
-        tnow = now()
+    def update_process(self, tnow=None, stamp=None):
+        # El tick de la app pasa la hora y el timestamp ya formateado (uno por tick para todos)
+        if tnow is None:
+            tnow = now()
         dt_seconds = max(0.001, (tnow - self._last_update).total_seconds())
         self._last_update = tnow
 
+        # minuto absoluto como entero (sin formatear strings en cada tick)
+        current_min = tnow.toordinal() * 1440 + tnow.hour * 60 + tnow.minute
+
         sp_cal = None
         if not self.manual_mode.get():
-            sp_cal = sp_from_date_calendar(self.cal_sp, tnow, default=None)
+            # El calendario tiene resolución de minuto: se busca una vez por minuto
+            # o cuando se reemplaza el calendario (el diálogo siempre entrega una copia nueva)
+            if current_min != self._sp_cal_min or self.cal_sp is not self._sp_cal_src:
+                self._sp_cal_min = current_min
+                self._sp_cal_src = self.cal_sp
+                self._sp_cal = sp_from_date_calendar(self.cal_sp, tnow, default=None)
+            sp_cal = self._sp_cal
             if sp_cal is not None:
                 try:
                     sp_val = float(sp_cal)
-                    self.sp.set(sp_val)
-                    self.sp_entry.set(f"{sp_val:.1f}")
+                    if sp_val != self._sp_val:
+                        self._sp_val = sp_val
+                        self.sp.set(sp_val)
+                        self.sp_entry.set(f"{sp_val:.1f}")
                 except Exception:
                     pass
 
-        current_min = tnow.strftime("%Y-%m-%d %H:%M")
         if self._last_min != current_min:
             doses = nut_fire_for_minute(self.cal_nut, tnow)
             if doses:
                 dur_total = sum(float(d) for d in doses if float(d) > 0)
                 if dur_total > 0:
                     self.nut_running_until = tnow + dt.timedelta(seconds=dur_total)
-                    self.hw.start_stepper(self.stepper_name, self.freq_nut.get())
+                    self.hw.start_stepper(self.stepper_name, self._freq_val)
             self._last_min = current_min
 
         schedule_active = False
@@ -1382,15 +2205,24 @@ class LightFermenterPanel(ttk.Frame):
         if self.hw.sim:
             self._simulate_temp(dt_seconds)
         else:
-            self.t = self.hw.read_temp_ds18b20(index=int(self.name[1:]) - 1)
-        self.t_str.set(f"{self.t:.1f}")
-        samples = self.app.flow_samples.get(self.name, [])
-        if samples:
-            self.flow_str.set(f"{samples[-1][1]:.2f} SCCM")
+            self.t = self.hw.latest_temps[self._sensor_index]
+        # Solo se escribe en Tk si el texto mostrado cambia
+        t_txt = f"{self.t:.1f}"
+        if t_txt != self._last_t_str:
+            self._last_t_str = t_txt
+            self.t_str.set(t_txt)
+        # Se formatea solo cuando llega una muestra nueva (otra tupla)
+        sample = self.app.flow_latest.get(self.name)
+        if sample is not self._last_flow_sample:
+            self._last_flow_sample = sample
+            flow_txt = f"{sample[1]:.2f} SCCM"
+            if flow_txt != self._last_flow_str:
+                self._last_flow_str = flow_txt
+                self.flow_str.set(flow_txt)
 
         if not self.manual_mode.get():
-            sp = float(self.sp.get())
-            band = max(0.05, float(self.band.get()))
+            sp = self._sp_val
+            band = max(0.05, self._band_val)
             # control frío
             if self.cold_in:
                 if self.t <= sp - band:
@@ -1410,7 +2242,7 @@ class LightFermenterPanel(ttk.Frame):
             self._apply_relays()
             self._sync_leds()
 
-        self._csv_write_row()
+        self._csv_write_row(stamp, tnow)
 
 
 # ------------------------------------------------------------
@@ -1438,7 +2270,7 @@ class RealTimePlotWindow:
 
         def set_window(h):
             self.current_window_hours = h
-            self.request_data()
+            self.request_data(force=True)
 
         for label, hours in [
             ("Tiempo real", None),
@@ -1471,8 +2303,20 @@ class RealTimePlotWindow:
         self.canvas.get_tk_widget().pack(fill="both", expand=True)
 
         self.ax_nut.xaxis.set_major_formatter(mdates.DateFormatter("%m-%d %H:%M"))
+        # Rotación/alineación de las etiquetas una sola vez: los ticks nuevos copian estas propiedades
+        self.fig.autofmt_xdate()
+        self.ax_temp.set_title("Temperatura vs. tiempo")
+        self.ax_temp.set_ylabel("°C")
+        self.ax_nut.set_ylabel("Nutrición ON=1")
+        self.ax_nut.set_ylim(-0.1, 1.1)
+        self.ax_nut.set_yticks([0, 1])
+        self.ax_nut.set_xlabel("Fecha y hora")
+        self._lines = {}
+        self._lines_all = []
+        self._lines_key = None
 
         self.top.protocol("WM_DELETE_WINDOW", self.close)
+        self.top.bind("<Map>", self._on_map)
         self.app._plot_windows.append(self.top)
 
         self.request_data()
@@ -1488,73 +2332,101 @@ class RealTimePlotWindow:
             self.app._plot_windows.remove(self.top)
         self.top.destroy()
 
-    def request_data(self):
-        if self._loading:
+    def _on_map(self, event):
+        # Al mostrarse (o restaurarse) se carga enseguida en vez de esperar al próximo ciclo
+        if event.widget is not self.top:
+            return
+        if self._refresh_job is not None:
+            self.top.after_cancel(self._refresh_job)
+            self._refresh_job = None
+        self.request_data()
+
+    def _visible(self):
+        try:
+            return self.top.state() != "iconic" and bool(self.top.winfo_viewable())
+        except tk.TclError:
+            return False
+
+    def request_data(self, force=False):
+        # force: un cambio de escala reemplaza la carga en curso (su resultado se descarta por id)
+        if self._loading and not force:
+            return
+        if not self._visible():
+            # Minimizada/oculta: no se carga ni se redibuja, solo se reprograma
+            self._refresh_job = self.top.after(5000, self.request_data)
             return
         self._loading = True
         self._load_id += 1
         req_id = self._load_id
 
         days_window = 3650 if self.current_window_hours is None else (self.current_window_hours / 24.0)
-        path = self.app.get_backup_path()
+        src = self.app._temp_plot_source(days_window, fermenter=self.fermenter)
+        # ~2 puntos por pixel de ancho del gráfico
+        max_points = 2 * max(800, self.canvas.get_tk_widget().winfo_width())
 
         def worker():
-            data = self.app._read_recent_backup(days=days_window, fermenter=self.fermenter, path=path)
-            self.app.after(0, lambda: self._on_data(req_id, data))
-
-        threading.Thread(target=worker, daemon=True).start()
+            if req_id != self._load_id:
+                return
+            data = self.app._temp_plot_series(src, days_window, self.fermenter, max_points)
+            self.app._io_done.put(lambda: self._on_data(req_id, data))
+
+        self.app._io_pool.submit(worker)
+
+    def _build_lines(self, key):
+        # Crea los Line2D una sola vez por combinación de fermentadores; después solo set_data
+        for line in self._lines_all:
+            line.remove()
+        self._lines = {}
+        self._lines_all = []
+        for ferm, show_nut in key:
+            (lt,) = self.ax_temp.plot([], [], label=f"{ferm} T")
+            (lsp,) = self.ax_temp.plot([], [], linestyle="--", label=f"{ferm} SP")
+            (lnut,) = self.ax_nut.plot(
+                [], [], drawstyle="steps-post", color="red", alpha=0.8, label=f"{ferm} Nutrición"
+            )
+            lnut.set_visible(show_nut)
+            self._lines[ferm] = {"t": lt, "sp": lsp, "nut": lnut}
+            self._lines_all.extend((lt, lsp, lnut))
+        handles = [line for line in self._lines_all if line.get_visible()]
+        legend = self.ax_temp.get_legend()
+        if legend is not None:
+            legend.remove()
+        if handles:
+            self.ax_temp.legend(handles, [line.get_label() for line in handles], loc="upper left")
+        self._lines_key = key
 
     def _on_data(self, req_id, data):
         if not self.top.winfo_exists() or req_id != self._load_id:
             return
         self._loading = False
 
-        self.ax_temp.clear()
-        self.ax_nut.clear()
+        items = [(ferm, series) for ferm, series in sorted(data.items()) if series["ts"]] if data else []
+        key = tuple((ferm, any(series.get("nut", ()))) for ferm, series in items)
+        if key != self._lines_key:
+            self._build_lines(key)
 
-        if not data:
+        if not items:
             self.status.config(text="Sin datos recientes en el backup.")
         else:
-            temps_all = []
-            for ferm, series in sorted(data.items()):
-                if not series["ts"]:
-                    continue
-                self.ax_temp.plot(series["ts"], series["t"], label=f"{ferm} T")
-                self.ax_temp.plot(series["ts"], series["sp"], linestyle="--", label=f"{ferm} SP")
-                temps_all.extend(series["t"])
-                nut = series.get("nut", [])
-                if nut and any(nut):
-                    self.ax_nut.step(series["ts"], nut, where="post", color="red", alpha=0.8, label=f"{ferm} Nutrición")
-
-            self.ax_temp.set_title("Temperatura vs. tiempo")
-            self.ax_temp.set_ylabel("°C")
-
-            if temps_all:
-                tmin = min(temps_all)
-                tmax = max(temps_all)
-                pad = (tmax - tmin) * 0.1 if tmax != tmin else 1.0
-                self.ax_temp.set_ylim(tmin - pad, tmax + pad)
-
-            self.ax_nut.set_ylabel("Nutrición ON=1")
-            self.ax_nut.set_ylim(-0.1, 1.1)
-            self.ax_nut.set_yticks([0, 1])
-            self.ax_nut.set_xlabel("Fecha y hora")
-
-            lines1, labels1 = self.ax_temp.get_legend_handles_labels()
-            lines2, labels2 = self.ax_nut.get_legend_handles_labels()
-            if lines1 or lines2:
-                self.ax_temp.legend(lines1 + lines2, labels1 + labels2, loc="upper left")
+            tmin = tmax = None
+            for ferm, series in items:
+                lines = self._lines[ferm]
+                lines["t"].set_data(series["ts"], series["t"])
+                lines["sp"].set_data(series["ts"], series["sp"])
+                lines["nut"].set_data(series["ts"], series.get("nut", []))
+                lo, hi = min(series["t"]), max(series["t"])
+                tmin = lo if tmin is None or lo < tmin else tmin
+                tmax = hi if tmax is None or hi > tmax else tmax
+
+            pad = (tmax - tmin) * 0.1 if tmax != tmin else 1.0
+            self.ax_temp.set_ylim(tmin - pad, tmax + pad)
 
             if self.current_window_hours is None:
-                all_ts = []
-                for series in data.values():
-                    all_ts.extend(series["ts"])
-                if all_ts:
-                    right = max(all_ts)
-                    left = min(all_ts)
-                    if left == right:
-                        left = right - dt.timedelta(minutes=1)
-                    self.ax_temp.set_xlim(left, right)
+                left = min(series["ts"][0] for _, series in items)
+                right = max(series["ts"][-1] for _, series in items)
+                if left == right:
+                    left = right - dt.timedelta(minutes=1)
+                self.ax_temp.set_xlim(left, right)
                 self.status.config(text="Fuente: backup global (tiempo real)")
             else:
                 right = now()
@@ -1567,7 +2439,6 @@ class RealTimePlotWindow:
                     rango = f"últimas {self.current_window_hours} horas"
                 self.status.config(text=f"Fuente: backup global ({rango})")
 
-        self.fig.autofmt_xdate()
         self.canvas.draw_idle()
 
         # Programar siguiente actualización
@@ -1618,9 +2489,9 @@ class FlowPlotWindow:
 
         def set_window(h):
             self.current_window_hours = h
-            self.request_flow_data()
-            self.request_nut_data()
-            self.refresh_plot()
+            self.request_flow_data(force=True)
+            self.request_nut_data(force=True)
+            self._request_draw()
 
         for label, hours in [
             ("Tiempo real", None),
@@ -1639,6 +2510,8 @@ class FlowPlotWindow:
         from matplotlib import dates as mdates  # type: ignore
         from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg  # type: ignore
 
+        _numpy()
+        self._date2num = mdates.date2num
         self.fig, (self.ax_flow, self.ax_nut) = plt.subplots(
             2,
             1,
@@ -1657,18 +2530,39 @@ class FlowPlotWindow:
         self.ax_nut.set_xlabel("Fecha y hora")
         self.ax_nut.grid(True, alpha=0.2)
         self.ax_nut.xaxis.set_major_formatter(mdates.DateFormatter("%m-%d %H:%M"))
+        # Rotación/alineación de las etiquetas una sola vez: los ticks nuevos copian estas propiedades
+        self.fig.autofmt_xdate()
 
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.top)
         self.canvas.get_tk_widget().pack(fill="both", expand=True)
 
+        # Blitting: las líneas se dibujan aparte sobre un fondo cacheado (ejes, ticks, textos)
+        # que solo se regenera cuando cambian los límites o el tamaño de la figura.
+        self.line_flow.set_animated(True)
+        self.line_nut.set_animated(True)
+        self._bg = None
+        self._limits = None
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+        # Redibujo solo si algo cambió (_plot_dirty o _plot_state distinto), vía after_idle
+        self._plot_dirty = True
+        self._plot_state = None
+        self._draw_pending = False
+        self._last_draw_t = 0.0
+
         self._refresh_job = None
         self._nut_refresh_job = None
+        self._hms_fmt = "{:02d}:{:02d}:{:02d}".format
+        self._last_countdown = -1
         self._nut_loading = False
         self._nut_load_id = 0
-        self.nut_cache = []
+        # Caches del backup en columnas: epoch float64 + valores
+        self.nut_cache = self._empty_cache("nut")
+        self._nut_live = None
         self._flow_loading = False
         self._flow_load_id = 0
-        self.flow_cache = []
+        self.flow_cache = self._empty_cache("flow")
+        # (backup, días) cubiertos por flow_cache
+        self._flow_loaded = (None, 0.0)
 
         self.top.protocol("WM_DELETE_WINDOW", self.close)
         self.app._plot_windows.append(self.top)
@@ -1696,35 +2590,55 @@ class FlowPlotWindow:
             self.app._flow_plot_windows.pop(self.fermenter, None)
         self.top.destroy()
 
-    def request_flow_data(self):
-        if self._flow_loading:
+    def request_flow_data(self, force=False):
+        if self._flow_loading and not force:
             return
-        self._flow_loading = True
-        self._flow_load_id += 1
-        req_id = self._flow_load_id
-
         hours = self.current_window_hours
         days_window = 3650 if hours is None else (hours / 24.0)
         path = self.app.get_co2_backup_path()
+        loaded_path, loaded_days = self._flow_loaded
+        if path == loaded_path and days_window <= loaded_days:
+            # Rango contenido en el cache ya cargado (lo nuevo está en el anillo en vivo):
+            # refresh_plot solo recorta, no hace falta releer el backup
+            return
+        self._flow_loading = True
+        self._flow_load_id += 1
+        req_id = self._flow_load_id
 
         def worker():
+            # Si ya hubo otro pedido (cambio de escala) no se lee el disco para nada
+            if req_id != self._flow_load_id:
+                return
             data = self.app._read_recent_co2_backup(days=days_window, fermenter=self.fermenter, path=path)
-            series = data.get(self.fermenter) if data else None
-            self.app.after(0, lambda: self._on_flow_data(req_id, series))
-
-        threading.Thread(target=worker, daemon=True).start()
+            cache = self._cache_from_series(data.get(self.fermenter) if data else None, "flow", np.float32)
+            self.app._io_done.put(lambda: self._on_flow_data(req_id, cache, (path, days_window)))
+
+        self.app._io_pool.submit(worker)
+
+    @staticmethod
+    def _empty_cache(key):
+        return {"ts": np.empty(0, dtype=np.float64), key: np.empty(0, dtype=np.float32)}
+
+    @staticmethod
+    def _cache_from_series(series, key, dtype):
+        # Conversión a columnas NumPy en el hilo de carga (una sola vez por carga)
+        if not series or not series.get("ts"):
+            return FlowPlotWindow._empty_cache(key)
+        return {
+            "ts": np.asarray(series["ts"], dtype=np.float64),
+            key: np.asarray(series[key], dtype=dtype),
+        }
 
-    def _on_flow_data(self, req_id, series):
+    def _on_flow_data(self, req_id, cache, loaded):
         if not self.top.winfo_exists() or req_id != self._flow_load_id:
             return
         self._flow_loading = False
-        if series and series.get("ts"):
-            self.flow_cache = list(zip(series["ts"], series.get("flow", [])))
-        else:
-            self.flow_cache = []
+        self.flow_cache = cache
+        self._flow_loaded = loaded
+        self._request_draw()
 
-    def request_nut_data(self):
-        if self._nut_loading:
+    def request_nut_data(self, force=False):
+        if self._nut_loading and not force:
             return
         self._nut_loading = True
         self._nut_load_id += 1
@@ -1732,23 +2646,24 @@ class FlowPlotWindow:
 
         hours = self.current_window_hours
         days_window = 3650 if hours is None else (hours / 24.0)
-        path = self.app.get_backup_path()
+        src = self.app._temp_plot_source(days_window, fermenter=self.fermenter)
+        max_points = 2 * max(800, self.canvas.get_tk_widget().winfo_width())
 
         def worker():
-            data = self.app._read_recent_backup(days=days_window, fermenter=self.fermenter, path=path)
-            series = data.get(self.fermenter) if data else None
-            self.app.after(0, lambda: self._on_nut_data(req_id, series))
+            if req_id != self._nut_load_id:
+                return
+            data = self.app._temp_plot_series(src, days_window, self.fermenter, max_points, as_datetime=False)
+            cache = self._cache_from_series(data.get(self.fermenter) if data else None, "nut", np.float32)
+            self.app._io_done.put(lambda: self._on_nut_data(req_id, cache))
 
-        threading.Thread(target=worker, daemon=True).start()
+        self.app._io_pool.submit(worker)
 
-    def _on_nut_data(self, req_id, series):
+    def _on_nut_data(self, req_id, cache):
         if not self.top.winfo_exists() or req_id != self._nut_load_id:
             return
         self._nut_loading = False
-        if series and series.get("ts"):
-            self.nut_cache = list(zip(series["ts"], series.get("nut", [])))
-        else:
-            self.nut_cache = []
+        self.nut_cache = cache
+        self._request_draw()
 
         # refrescar cache cada 15s
         self._nut_refresh_job = self.top.after(15000, self.request_nut_data)
@@ -1756,119 +2671,248 @@ class FlowPlotWindow:
     def refresh_loop(self):
         if not self.top.winfo_exists():
             return
-        self.refresh_plot()
+        state = self._current_plot_state()
+        if self._plot_dirty or state != self._plot_state:
+            self._plot_state = state
+            self._request_draw()
         self.refresh_stats()
         self.refresh_countdown()
         self._refresh_job = self.top.after(1000, self.refresh_loop)
 
-    def _combined_flow_samples(self):
-        samples = list(self.app.flow_samples.get(self.fermenter, []))
-        if not self.flow_cache:
-            return samples
-        sample_ts = {ts for ts, *_ in samples}
-        combined = [(ts, flow, None, None, "BACKUP") for ts, flow in self.flow_cache if ts not in sample_ts]
-        combined.extend(samples)
-        combined.sort(key=lambda row: row[0])
-        return combined
+    def _current_plot_state(self):
+        # Lo que cambia el dibujo entre cargas: última muestra viva, cambios de nutrición
+        # y el borde derecho del eje (que avanza a saltos con _right_edge)
+        hist = self.app.flow_samples.get(self.fermenter)
+        nut = self.app.nut_samples.get(self.fermenter)
+        hours = self.current_window_hours
+        right = None if hours is None else self._right_edge(dt.timedelta(hours=hours))
+        return (
+            hist.last if hist is not None else None,
+            len(nut) if nut else 0,
+            nut[-1] if nut else None,
+            self._current_nut_state(),
+            hours,
+            right,
+        )
+
+    def _request_draw(self):
+        self._plot_dirty = True
+        if self._draw_pending:
+            return
+        self._draw_pending = True
+        wait = PLOT_MIN_DRAW_SEC - (time.monotonic() - self._last_draw_t)
+        if wait > 0:
+            self.top.after(int(wait * 1000) + 1, self._do_draw)
+        else:
+            self.top.after_idle(self._do_draw)
+
+    def _do_draw(self):
+        self._draw_pending = False
+        if not self.top.winfo_exists():
+            return
+        self._plot_dirty = False
+        self._last_draw_t = time.monotonic()
+        self.refresh_plot()
+
+    def _combined_flow_samples(self, left: float = -math.inf):
+        # (ts epoch, caudal) desde left: backup previo al primer dato en memoria + anillo
+        # en vivo. Del cache del backup se toma una vista (sin copia) y solo se concatena
+        # la ventana. El backup guarda segundos enteros: se corta en floor(primer ts vivo).
+        b_ts, b_flow = self.flow_cache["ts"], self.flow_cache["flow"]
+        j = np.searchsorted(b_ts, left, side="left") if left > -math.inf else 0
+        b_ts, b_flow = b_ts[j:], b_flow[j:]
+        hist = self.app.flow_samples.get(self.fermenter)
+        if hist is None or not len(hist):
+            return b_ts, b_flow
+        ts_arr, flow_arr = hist.since(left)
+        if not ts_arr:
+            return b_ts, b_flow
+        live_ts = np.frombuffer(ts_arr, dtype=np.float64)
+        live_flow = np.frombuffer(flow_arr, dtype=np.float32)
+        if not len(b_ts):
+            return live_ts, live_flow
+        k = np.searchsorted(b_ts, math.floor(live_ts[0]), side="left")
+        return np.concatenate((b_ts[:k], live_ts)), np.concatenate((b_flow[:k], live_flow))
 
     def _current_nut_state(self):
-        for panel in self.app.ferms:
-            if panel.name == self.fermenter:
-                return 1 if panel._nut_led_on else 0
-        return None
-
-    def _combined_nut_samples(self, left, right):
-        points = []
-        for source in (self.nut_cache, self.app.nut_samples.get(self.fermenter, [])):
-            for ts, val in source:
-                if left <= ts <= right:
-                    points.append((ts, val))
-        if points:
-            points.sort(key=lambda row: row[0])
-            dedup = []
-            for ts, val in points:
-                if dedup and ts == dedup[-1][0]:
-                    dedup[-1] = (ts, val)
-                else:
-                    dedup.append((ts, val))
-            points = dedup
+        panel = self.app._ferm_by_name.get(self.fermenter)
+        if panel is None:
+            return None
+        return 1 if panel._nut_led_on else 0
+
+    def _combined_nut_samples(self, left: float, right: float):
+        # Igual que el caudal: cache del backup hasta el primer cambio registrado en vivo
+        c_ts, c_nut = self.nut_cache["ts"], self.nut_cache["nut"]
+        live = self.app.nut_samples.get(self.fermenter, ())
+        if live:
+            # Los cambios en vivo son pocos y casi nunca cambian entre dibujos: se convierten
+            # a columnas solo cuando el deque cambió (largo o extremos distintos)
+            key = (len(live), live[0], live[-1])
+            if self._nut_live is None or self._nut_live[0] != key:
+                self._nut_live = (
+                    key,
+                    np.fromiter((ts for ts, _ in live), dtype=np.float64, count=len(live)),
+                    np.fromiter((val for _, val in live), dtype=np.float32, count=len(live)),
+                )
+            _, l_ts, l_nut = self._nut_live
+            k = np.searchsorted(c_ts, math.floor(l_ts[0]), side="left")
+            ts = np.concatenate((c_ts[:k], l_ts))
+            vals = np.concatenate((c_nut[:k], l_nut))
+        else:
+            ts, vals = c_ts, c_nut
+        lo = np.searchsorted(ts, left, side="left")
+        hi = np.searchsorted(ts, right, side="right")
+        ts, vals = ts[lo:hi], vals[lo:hi]
         current_state = self._current_nut_state()
-        if current_state is not None:
-            if not points or points[-1][0] < right:
-                points.append((right, current_state))
-        return points
+        if current_state is not None and (not len(ts) or ts[-1] < right):
+            ts = np.append(ts, right)
+            vals = np.append(vals, current_state)
+        return ts, vals
+
+    @staticmethod
+    def _decimate_minmax(ts, vals, nbins: int):
+        # Mínimo y máximo de cada tramo (en su orden temporal): ~2 puntos por pixel sin perder picos
+        n = len(vals)
+        if nbins <= 0 or n <= 2 * nbins:
+            return ts, vals
+        k = -(-n // nbins)
+        rows = n // k
+        m = rows * k
+        v = vals[:m].reshape(rows, k)
+        t = ts[:m].reshape(rows, k)
+        imin = v.argmin(axis=1)
+        imax = v.argmax(axis=1)
+        first = np.minimum(imin, imax)
+        second = np.maximum(imin, imax)
+        r = np.arange(rows)
+        out_ts = np.empty(2 * rows, dtype=ts.dtype)
+        out_v = np.empty(2 * rows, dtype=vals.dtype)
+        out_ts[0::2] = t[r, first]
+        out_ts[1::2] = t[r, second]
+        out_v[0::2] = v[r, first]
+        out_v[1::2] = v[r, second]
+        # el tramo final incompleto (< k puntos) va sin diezmar
+        return np.concatenate((out_ts, ts[m:])), np.concatenate((out_v, vals[m:]))
+
+    def _datenum_shift(self, ref: dt.datetime) -> float:
+        # Desplazamiento epoch -> fecha de Matplotlib en hora local, calculado una vez por dibujo
+        # (referencia: el borde derecho); fecha = ts / 86400 + shift
+        return self._date2num(ref) - ref.timestamp() / 86400.0
+
+    def _on_draw(self, event):
+        # Tras cada redibujo completo: guardar el fondo y pintar encima las líneas animadas
+        self._bg = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.ax_flow.draw_artist(self.line_flow)
+        self.ax_nut.draw_artist(self.line_nut)
+
+    def _redraw(self, xlim, ylim):
+        # Redibujo completo solo si cambian los límites; si no, blit de las dos líneas
+        limits = (xlim, ylim)
+        if self._bg is None or limits != self._limits:
+            self._limits = limits
+            self.ax_flow.set_xlim(*xlim)
+            if ylim is not None:
+                self.ax_flow.set_ylim(*ylim)
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self._bg)
+        self.ax_flow.draw_artist(self.line_flow)
+        self.ax_nut.draw_artist(self.line_nut)
+        self.canvas.blit(self.fig.bbox)
+
+    def _right_edge(self, span: dt.timedelta) -> dt.datetime:
+        # Borde derecho redondeado hacia arriba a ~1/200 del rango (mín. 1 s): el eje avanza
+        # a saltos imperceptibles y entre saltos el refresco por segundo usa blit.
+        step = max(1, int(span.total_seconds() / 200))
+        t = now()
+        base = t.replace(microsecond=0)
+        if t.microsecond:
+            base += dt.timedelta(seconds=1)
+        return base + dt.timedelta(seconds=(-int(base.timestamp())) % step)
 
     def refresh_plot(self):
-        samples = self._combined_flow_samples()
-        if not samples:
+        if self.current_window_hours is None:
+            ts, flow = self._combined_flow_samples()
+        else:
+            span = dt.timedelta(hours=self.current_window_hours)
+            right = self._right_edge(span)
+            left = right - span
+            ts, flow = self._combined_flow_samples(left.timestamp())
+        if not len(ts) and self.current_window_hours is None:
             self.line_flow.set_data([], [])
             self.line_nut.set_data([], [])
-            self.canvas.draw_idle()
+            if self._bg is None or self._limits is None:
+                self.canvas.draw()
+            else:
+                self._redraw(*self._limits)
             return
 
         if self.current_window_hours is None:
-            windowed = samples
-            right = windowed[-1][0]
-            left = windowed[0][0]
+            right = dt.datetime.fromtimestamp(float(ts[-1]))
+            left = dt.datetime.fromtimestamp(float(ts[0]))
             if left == right:
                 left = right - dt.timedelta(seconds=max(1, self.app.flow_sample_period[self.fermenter]))
-            right = max(right, now())
+            right = max(right, self._right_edge(right - left))
         else:
-            right = now()
-            left = right - dt.timedelta(hours=self.current_window_hours)
-            windowed = [row for row in samples if left <= row[0] <= right]
-            if not windowed:
+            lo = np.searchsorted(ts, left.timestamp(), side="left")
+            hi = np.searchsorted(ts, right.timestamp(), side="right")
+            ts, flow = ts[lo:hi], flow[lo:hi]
+            if not len(ts):
                 self.line_flow.set_data([], [])
                 self.line_nut.set_data([], [])
-                self.ax_flow.set_xlim(left, right)
-                self.canvas.draw_idle()
+                shift = self._datenum_shift(right)
+                self._redraw((left.timestamp() / 86400.0 + shift, right.timestamp() / 86400.0 + shift), None)
                 return
 
-        times = [ts for ts, _, _, _, _ in windowed]
-        values = [flow for _, flow, _, _, _ in windowed]
-        self.line_flow.set_data(times, values)
-        self.ax_flow.set_xlim(left, right)
+        vmin = float(flow.min())
+        vmax = float(flow.max())
+        # Solo se diezma lo que se dibuja; los caches quedan con la resolución completa
+        ts, flow = self._decimate_minmax(ts, flow, int(self.ax_flow.bbox.width))
+        # Todo en fechas de Matplotlib (float) con el mismo desplazamiento: líneas y límites
+        left_s, right_s = left.timestamp(), right.timestamp()
+        shift = self._datenum_shift(right)
+        self.line_flow.set_data(ts / 86400.0 + shift, flow)
 
-        vmin = min(values)
-        vmax = max(values)
-        pad = (vmax - vmin) * 0.1 if vmax != vmin else 1.0
-        self.ax_flow.set_ylim(vmin - pad, vmax + pad)
+        nut_ts, nut_vals = self._combined_nut_samples(left_s, right_s)
+        self.line_nut.set_data(nut_ts / 86400.0 + shift, nut_vals)
 
-        nut_points = self._combined_nut_samples(left, right)
-        if nut_points:
-            nut_times = [ts for ts, _ in nut_points]
-            nut_values = [val for _, val in nut_points]
-            self.line_nut.set_data(nut_times, nut_values)
-        else:
-            self.line_nut.set_data([], [])
+        self._redraw((left_s / 86400.0 + shift, right_s / 86400.0 + shift), self._flow_ylim(vmin, vmax))
 
-        self.fig.autofmt_xdate()
-        self.canvas.draw_idle()
+    def _flow_ylim(self, vmin: float, vmax: float):
+        # Margen del 10 %; si los datos siguen dentro del eje Y actual y el nuevo rango difiere
+        # menos de un 5 % del alto, se conserva el actual (sin redibujo completo, sigue el blit)
+        pad = (vmax - vmin) * 0.1 if vmax != vmin else 1.0
+        ylim = (vmin - pad, vmax + pad)
+        old = self._limits[1] if self._limits is not None else None
+        if old is not None and old[0] <= vmin and vmax <= old[1]:
+            tol = (old[1] - old[0]) * 0.05
+            if abs(ylim[0] - old[0]) <= tol and abs(ylim[1] - old[1]) <= tol:
+                return old
+        return ylim
 
     def refresh_stats(self):
-        samples = self.app.flow_samples.get(self.fermenter, [])
-        if not samples:
+        hist = self.app.flow_samples.get(self.fermenter)
+        if hist is None or hist.last is None:
             self.flow_var.set("0.00 SCCM")
             self.status_var.set("Esperando...")
             return
-        _, flow, _current_ma, _voltage, status = samples[-1]
+        _, flow, _current_ma, _voltage, status = hist.last
         self.flow_var.set(f"{flow:0.2f} SCCM")
         self.status_var.set(status)
 
     def refresh_countdown(self):
         next_sample = self.app.flow_next_sample.get(self.fermenter)
-        if next_sample is None:
+        total = None if next_sample is None else max(0, int(next_sample - time.time()))
+        # StringVar.set solo si cambió el valor mostrado
+        if total == self._last_countdown:
+            return
+        self._last_countdown = total
+        if total is None:
             self.next_var.set("--:--:--")
             return
-        delta = next_sample - now()
-        if delta.total_seconds() < 0:
-            self.next_var.set("00:00:00")
-        else:
-            total = int(delta.total_seconds())
-            hh = total // 3600
-            mm = (total % 3600) // 60
-            ss = total % 60
-            self.next_var.set(f"{hh:02d}:{mm:02d}:{ss:02d}")
+        mm, ss = divmod(total, 60)
+        hh, mm = divmod(mm, 60)
+        self.next_var.set(self._hms_fmt(hh, mm, ss))
 
 
 # ------------------------------------------------------------
@@ -1877,6 +2921,9 @@ class FlowPlotWindow:
 
 
 class App(tk.Tk):
+    _CO2_CSV_FIELDS = ("timestamp", "fermentador", "flow_sccm", "status")
+    _CO2_BACKUP_CSV_FIELDS = ("timestamp", "fermentador", "flow_sccm", "current_ma", "voltage", "status")
+
     def __init__(self):
         super().__init__()
 
@@ -1908,15 +2955,29 @@ class App(tk.Tk):
         self.hw = Hardware()
         self.flow_readers = {}
         self.flow_samples = {}
-        self.flow_next_sample = {}
+        self.flow_latest = {}  # fermentador -> última tupla de muestra (la misma que FlowHistory.last)
+        self.flow_next_sample = {}  # fermentador -> epoch (s) de la próxima muestra
+        self._flow_due = []  # heap (próxima muestra, fermentador): solo lo toca el hilo de muestreo
+        # Lecturas ADS1115 en un hilo propio; el loop de Tk solo drena _flow_results
+        self._flow_results = queue.SimpleQueue()
+        self._flow_stop = threading.Event()
+        self._flow_worker = None
         self.flow_sample_period = {}
+        self._flow_last_emit = {}  # fermentador -> (epoch, caudal, estado) de la última fila escrita
         self.nut_samples = {}
+        self.temp_history = {}
+        self._temp_seed_id = 0  # id de la última carga inicial (pick_backup descarta las anteriores)
+        self._backup_cache = {}
+        self._backup_cache_lock = threading.Lock()
+        # Hilos compartidos para cargas de backup/gráficos (en vez de un hilo nuevo por pedido)
+        self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="backup-io")
         self.nut_last_state = {}
         self.co2_csv_dir = {}
         self.co2_csv_name = {}
         self.co2_csv_running = {}
         self.co2_csv_paused = {}
         self.co2_csv_last_export_ok = {}
+        self.co2_csv_error = {}
         self._co2_csv_leds = {}
 
         default_channels = {"F1": 0, "F2": 1, "F3": 2}
@@ -1931,22 +2992,26 @@ class App(tk.Tk):
             shunt = SHUNT_OHMS.get(name, DEFAULT_SHUNT_OHMS)
             reader = ADS1115Reader(addr, ch, gain, shunt)
             self.flow_readers[name] = reader
-            self.flow_samples[name] = []
             self.flow_next_sample[name] = None
+            self._flow_due.append((-math.inf, name))
             if SAMPLE_PERIOD_SEC is None:
                 period = 1 if reader.sim else 10
             else:
                 period = SAMPLE_PERIOD_SEC
+            # SAMPLE_PERIOD_SEC=0 (o negativo) se toma como 1 s, como el muestreo por tick original
+            period = max(1, period)
             self.flow_sample_period[name] = period
-            self.nut_samples[name] = []
+            self.flow_samples[name] = FlowHistory(MAX_FLOW_HISTORY_SEC // period)
+            self.temp_history[name] = TempHistory(TEMP_HISTORY_DAYS * 86400)
+            self.nut_samples[name] = deque()
             self.nut_last_state[name] = None
-            self.co2_csv_dir[name] = tk.StringVar(value=os.path.abspath("./Proceso"))
+            self.co2_csv_dir[name] = tk.StringVar(value=_PROCESO_DIR)
             # Nombre base pedido para CSV CO2 (se agrega .csv en _co2_csv_path si falta)
             self.co2_csv_name[name] = tk.StringVar(value=f"CO2_{name}")
             self.co2_csv_running[name] = False
             self.co2_csv_paused[name] = False
             self.co2_csv_last_export_ok[name] = False
-            os.makedirs(self.co2_csv_dir[name].get(), exist_ok=True)
+            self.co2_csv_error[name] = None
         self._flow_plot_windows = {}
 
         # ---------- LOGO CII ----------
@@ -1954,6 +3019,7 @@ class App(tk.Tk):
         logo_path = os.path.join(ASSETS_DIR, "logo_cii.png")
         if os.path.exists(logo_path):
             try:
+                _pil()
                 pil_img = Image.open(logo_path)
                 pil_img = pil_img.resize((160, 80))
                 self.logo_img = ImageTk.PhotoImage(pil_img)
@@ -1986,6 +3052,7 @@ class App(tk.Tk):
         backup_frame.grid_columnconfigure(1, weight=1)
 
         self.backup_path = tk.StringVar(value=os.path.abspath("./Backup/backup_global_temperatura.csv"))
+        self._csv_writer = _CSV_WRITER
         ttk.Label(backup_frame, text="Backup global temperatura:").grid(row=0, column=0, sticky="w")
         ttk.Entry(backup_frame, textvariable=self.backup_path).grid(row=0, column=1, sticky="ew", padx=(4, 4))
         ttk.Button(backup_frame, text="Destino…", command=self.pick_backup).grid(row=0, column=2, padx=(4, 0))
@@ -1998,6 +3065,17 @@ class App(tk.Tk):
         ttk.Button(backup_frame, text="Destino…", command=self.pick_backup_co2).grid(
             row=1, column=2, padx=(4, 0), pady=(4, 0)
         )
+        # Estado de escritura de cada backup (el writer escribe en segundo plano: _tick revisa sus errores)
+        self._backup_leds = {"temp": Led(backup_frame), "co2": Led(backup_frame)}
+        self._backup_leds["temp"].widget().grid(row=0, column=3, padx=(6, 0))
+        self._backup_leds["co2"].widget().grid(row=1, column=3, padx=(6, 0), pady=(4, 0))
+        for led in self._backup_leds.values():
+            led.set_color(Led.ON_COLOR)
+        self._backup_errors = {"temp": None, "co2": None}
+        self.backup_status_var = tk.StringVar(value="")
+        ttk.Label(backup_frame, textvariable=self.backup_status_var, foreground="#ef4444").grid(
+            row=3, column=0, columnspan=4, sticky="w", pady=(4, 0)
+        )
         backup_btns = ttk.Frame(backup_frame)
         backup_btns.grid(row=2, column=0, columnspan=3, sticky="w", pady=(6, 0))
         ttk.Button(backup_btns, text="Borrar backup temperatura", command=self.clear_backup_temp).pack(
@@ -2021,6 +3099,7 @@ class App(tk.Tk):
             panel = LightFermenterPanel(border, self, f"F{i+1}", self.hw, backup_path_getter=self.get_backup_path)
             panel.grid(row=0, column=0, sticky="nsew", padx=4, pady=4)
             self.ferms.append(panel)
+        self._ferm_by_name = {p.name: p for p in self.ferms}
 
         # Footer
         footer = ttk.Frame(main.inner)
@@ -2037,11 +3116,24 @@ class App(tk.Tk):
         self.clock_var = tk.StringVar(value=now_str())
         ttk.Label(footer, textvariable=self.clock_var).grid(row=0, column=2, sticky="e")
 
+        # Resultados de los hilos de backup/gráficos: se encolan y los aplica _tick en el hilo
+        # de Tk (desde otro hilo no se llama a after())
+        self._io_done = queue.SimpleQueue()
+        # El tick se reprograma siempre con el mismo método ligado
+        self._tick_cb = self._tick
         self._tick_job = None
         self._plot_windows = []
         self._closing = False
+        # Minimizada no se escribe el reloj (el stamp se sigue armando para los CSV)
+        self._clock_visible = True
+        self.bind("<Map>", self._on_main_map, add="+")
+        self.bind("<Unmap>", self._on_main_unmap, add="+")
         self.protocol("WM_DELETE_WINDOW", self.on_close)
         self._log_flowmeters_status()
+        self.hw.start_temp_poller([f.t for f in self.ferms])
+        self._flow_worker = threading.Thread(target=self._flow_worker_loop, name="flow-sampler", daemon=True)
+        self._flow_worker.start()
+        self._seed_temp_history()
         self._tick()
 
     # ===== util backup =====
@@ -2071,8 +3163,7 @@ class App(tk.Tk):
             self.backup_path.set(path)
         if not path.lower().endswith(".csv"):
             path += ".csv"
-        d = os.path.dirname(path) or "."
-        os.makedirs(d, exist_ok=True)
+        # La carpeta la crea el writer al abrir el archivo (una vez por apertura)
         return path
 
     def pick_backup(self):
@@ -2084,8 +3175,13 @@ class App(tk.Tk):
         )
         _restore_focus(self)
         if fn:
+            self._csv_writer.release(self.get_backup_path(), timeout=0)
             self.backup_path.set(fn)
             os.makedirs(os.path.dirname(fn), exist_ok=True)
+            # Los gráficos pasan a mostrar el archivo nuevo: se rehace el historial desde él
+            for hist in self.temp_history.values():
+                hist.clear()
+            self._seed_temp_history()
 
     def clear_backup_temp(self):
         path = self.get_backup_path()
@@ -2095,7 +3191,10 @@ class App(tk.Tk):
         if not messagebox.askyesno("Backup temperatura", f"¿Borrar backup?\n{path}"):
             return
         try:
+            self._csv_writer.release(path)
             os.remove(path)
+            for hist in self.temp_history.values():
+                hist.clear()
             messagebox.showinfo("Backup temperatura", f"Backup borrado:\n{path}")
         except Exception as e:
             messagebox.showerror("Backup temperatura", f"No se pudo borrar.\n{e}")
@@ -2107,8 +3206,6 @@ class App(tk.Tk):
             self.backup_co2_path.set(path)
         if not path.lower().endswith(".csv"):
             path += ".csv"
-        d = os.path.dirname(path) or "."
-        os.makedirs(d, exist_ok=True)
         return path
 
     def pick_backup_co2(self):
@@ -2120,6 +3217,7 @@ class App(tk.Tk):
         )
         _restore_focus(self)
         if fn:
+            self._csv_writer.release(self.get_co2_backup_path(), timeout=0)
             self.backup_co2_path.set(fn)
             os.makedirs(os.path.dirname(fn), exist_ok=True)
 
@@ -2131,84 +3229,178 @@ class App(tk.Tk):
         if not messagebox.askyesno("Backup CO2", f"¿Borrar backup?\n{path}"):
             return
         try:
+            self._csv_writer.release(path)
             os.remove(path)
             messagebox.showinfo("Backup CO2", f"Backup borrado:\n{path}")
         except Exception as e:
             messagebox.showerror("Backup CO2", f"No se pudo borrar.\n{e}")
 
-    def _read_recent_backup(self, days=10, fermenter=None, path=None):
-        if path is None:
-            path = self.get_backup_path()
-        if not os.path.exists(path):
-            return {}
-        cutoff = now() - dt.timedelta(days=days)
+    def _seed_temp_history(self):
+        # Única lectura del backup: completa el historial en memoria con lo previo al arranque
+        path = self.get_backup_path()
+        self._temp_seed_id += 1
+        seed_id = self._temp_seed_id
+
+        def worker():
+            data = self._read_recent_backup(days=TEMP_HISTORY_DAYS, path=path)
+            self._io_done.put(lambda: self._on_temp_seed(seed_id, data))
+
+        self._io_pool.submit(worker)
+
+    def _on_temp_seed(self, seed_id, data):
+        if seed_id != self._temp_seed_id:
+            return
+        for ferm, series in data.items():
+            hist = self.temp_history.get(ferm)
+            if hist is None or not series["ts"]:
+                continue
+            hist.prepend(series["ts"], series["t"], series["sp"], series["nut"])
+
+    def _temp_history_snapshot(self, days, fermenter=None):
+        # Se llama en el hilo de Tk (el mismo que escribe el historial)
+        ts0 = time.time() - days * 86400.0
+        names = [fermenter] if fermenter else sorted(self.temp_history)
+        return {name: self.temp_history[name].since(ts0) for name in names if name in self.temp_history}
+
+    def _temp_plot_source(self, days, fermenter=None):
+        # En el hilo de Tk. El historial en memoria cubre TEMP_HISTORY_DAYS: para ventanas
+        # más largas se devuelve la ruta del backup y el hilo de carga lee el archivo.
+        if days > TEMP_HISTORY_DAYS:
+            return self.get_backup_path()
+        return self._temp_history_snapshot(days, fermenter=fermenter)
+
+    def _temp_plot_series(self, src, days, fermenter, max_points=None, as_datetime=True):
+        # En el hilo de carga: src es lo que devolvió _temp_plot_source
+        if isinstance(src, str):
+            data = self._read_recent_backup(days=days, fermenter=fermenter, path=src, cache=True)
+            src = {
+                ferm: (array("d", s["ts"]), array("d", s["t"]), array("d", s["sp"]), array("i", s["nut"]))
+                for ferm, s in data.items()
+            }
+        return self._temp_series_from_snapshot(src, max_points, as_datetime)
+
+    @staticmethod
+    def _temp_series_from_snapshot(snap, max_points=None, as_datetime=True):
+        # Conversión a datetime para Matplotlib (en el hilo de carga). Con max_points
+        # se diezma antes de convertir: T/SP por paso fijo y nutrición con el máximo
+        # de cada tramo para no perder pulsos cortos. Con as_datetime=False ts queda en epoch.
+        fromts = dt.datetime.fromtimestamp
         data = {}
+        for ferm, (ts, t, sp, nut) in snap.items():
+            if not ts:
+                continue
+            n = len(ts)
+            if max_points and n > max_points:
+                step = -(-n // max_points)
+                ts, t, sp = ts[::step], t[::step], sp[::step]
+                nut = [max(nut[i : i + step]) for i in range(0, n, step)]
+            else:
+                nut = nut.tolist()
+            ts = [fromts(x) for x in ts] if as_datetime else ts.tolist()
+            data[ferm] = {"ts": ts, "t": t.tolist(), "sp": sp.tolist(), "nut": nut}
+        return data
+
+    def _parse_backup_tail(self, path, entry):
+        # Parsea desde entry["offset"] hasta la última línea completa y agrega a entry["series"] (ts en segundos epoch)
+        with open(path, "rb") as fb:
+            if entry["offset"] is None:
+                header = fb.readline()
+                names = next(csv.reader([header.decode("utf-8")]), [])
+                idx = {name.strip(): i for i, name in enumerate(names)}
+                if "timestamp" not in idx:
+                    entry["offset"] = fb.seek(0, os.SEEK_END)
+                    return
+                entry["cols"] = (
+                    idx["timestamp"],
+                    idx.get("fermentador"),
+                    # Índices resueltos una sola vez; el valor por defecto ya convertido
+                    tuple((key, idx.get(col), conv, conv(default)) for key, col, conv, default in entry["fields"]),
+                )
+                entry["data_start"] = start = fb.tell()
+                if os.fstat(fb.fileno()).st_size > start:
+                    since = now_str(entry["since"]).encode()
+                    with mmap.mmap(fb.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        fb.seek(_csv_offset_since(mm, since, start))
+                entry["start"] = fb.tell()
+            else:
+                fb.seek(entry["offset"])
+            pos = fb.tell()
+            chunk = fb.read()
+        end = chunk.rfind(b"\n") + 1
+        entry["offset"] = pos + end
+        if not end or entry["cols"] is None:
+            return
+        _parse_backup_rows(chunk[:end], entry["cols"], entry["since"], entry["series"])
+
+    def _extend_backup_head(self, path, entry, cutoff):
+        # Amplía un cache hacia atrás (otra ventana pidió más días): solo se parsea el tramo
+        # [cutoff, since) del archivo y se antepone a las series ya cargadas
+        if entry["cols"] is not None:
+            with open(path, "rb") as fb, mmap.mmap(fb.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pos = _csv_offset_since(mm, now_str(cutoff).encode(), entry["data_start"])
+                chunk = mm[pos : entry["start"]] if pos < entry["start"] else b""
+            head = {}
+            if chunk:
+                _parse_backup_rows(chunk, entry["cols"], cutoff, head)
+            for ferm, series in entry["series"].items():
+                old = head.get(ferm)
+                if old is not None:
+                    head[ferm] = {key: old[key] + col for key, col in series.items()}
+                else:
+                    head[ferm] = series
+            entry["series"] = head
+            entry["start"] = min(pos, entry["start"])
+        entry["since"] = cutoff
+
+    def _read_backup(self, path, days, fermenter, fields, cache):
+        # Con cache=True el archivo parseado queda en memoria (por path) y en las llamadas
+        # siguientes solo se lee la cola nueva; el filtro por fecha se aplica al devolver.
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    ts_raw = (row.get("timestamp") or "").strip()
-                    ts = None
-                    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y/%m/%d %H:%M:%S"):
-                        try:
-                            ts = dt.datetime.strptime(ts_raw, fmt)
-                            break
-                        except Exception:
-                            continue
-                    if not ts or ts < cutoff:
-                        continue
-                    ferm = row.get("fermentador", "?").strip() or "?"
-                    if fermenter and ferm != fermenter:
-                        continue
-                    try:
-                        temp = float(row.get("T", "nan"))
-                        sp = float(row.get("SP", "nan"))
-                        nut = int(row.get("nutricion_activa", "0") or 0)
-                    except Exception:
-                        continue
-                    data.setdefault(ferm, {"ts": [], "t": [], "sp": [], "nut": []})
-                    data[ferm]["ts"].append(ts)
-                    data[ferm]["t"].append(temp)
-                    data[ferm]["sp"].append(sp)
-                    data[ferm]["nut"].append(nut)
-        except Exception:
+            st = os.stat(path)
+        except OSError:
             return {}
-        return data
+        # En segundos enteros, igual que los timestamps del archivo (búsqueda por bytes y filtro coinciden)
+        cutoff = (now() - dt.timedelta(days=days)).replace(microsecond=0)
+        with self._backup_cache_lock:
+            entry = self._backup_cache.get(path) if cache else None
+            if (
+                entry is None
+                or entry["fields"] is not fields
+                or entry["ino"] != st.st_ino
+                or st.st_size < entry["offset"]
+            ):
+                entry = {"ino": st.st_ino, "fields": fields, "since": cutoff, "offset": None, "cols": None, "series": {}}
+                if cache:
+                    self._backup_cache[path] = entry
+            try:
+                if entry["offset"] is None or st.st_size > entry["offset"]:
+                    self._parse_backup_tail(path, entry)
+                if cutoff < entry["since"]:
+                    self._extend_backup_head(path, entry, cutoff)
+            except Exception:
+                self._backup_cache.pop(path, None)
+                return {}
+            data = {}
+            cutoff_ts = cutoff.timestamp()
+            for ferm, series in entry["series"].items():
+                if fermenter and ferm != fermenter:
+                    continue
+                i = bisect.bisect_left(series["ts"], cutoff_ts)
+                if i < len(series["ts"]):
+                    data[ferm] = {key: col[i:] for key, col in series.items()}
+            return data
+
+    def _read_recent_backup(self, days=10, fermenter=None, path=None, cache=False):
+        if path is None:
+            path = self.get_backup_path()
+        # La carga inicial del historial no se cachea; el gráfico con ventana mayor que el
+        # historial en memoria sí (en cada refresco solo se lee la cola nueva)
+        return self._read_backup(path, days, fermenter, _TEMP_BACKUP_FIELDS, cache=cache)
 
     def _read_recent_co2_backup(self, days=10, fermenter=None, path=None):
         if path is None:
             path = self.get_co2_backup_path()
-        if not os.path.exists(path):
-            return {}
-        cutoff = now() - dt.timedelta(days=days)
-        data = {}
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    ts_raw = (row.get("timestamp") or "").strip()
-                    ts = None
-                    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y/%m/%d %H:%M:%S"):
-                        try:
-                            ts = dt.datetime.strptime(ts_raw, fmt)
-                            break
-                        except Exception:
-                            continue
-                    if not ts or ts < cutoff:
-                        continue
-                    ferm = row.get("fermentador", "?").strip() or "?"
-                    if fermenter and ferm != fermenter:
-                        continue
-                    try:
-                        flow = float(row.get("flow_sccm", "nan"))
-                    except Exception:
-                        continue
-                    data.setdefault(ferm, {"ts": [], "flow": []})
-                    data[ferm]["ts"].append(ts)
-                    data[ferm]["flow"].append(flow)
-        except Exception:
-            return {}
-        return data
+        return self._read_backup(path, days, fermenter, _CO2_BACKUP_FIELDS, cache=True)
 
     def _co2_csv_path(self, fermenter):
         name = self.co2_csv_name[fermenter].get().strip() or f"{fermenter}_co2.csv"
@@ -2245,6 +3437,16 @@ class App(tk.Tk):
             os.makedirs(d, exist_ok=True)
 
     def co2_csv_start(self, fermenter):
+        path = self._co2_csv_path(fermenter)
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "a", encoding="utf-8"):
+                pass
+        except OSError as e:
+            messagebox.showerror("CSV CO2", f"No se puede escribir en:\n{path}\n{e}")
+            return
+        self.co2_csv_error[fermenter] = None
+        self._flow_last_emit.pop(fermenter, None)
         self.co2_csv_running[fermenter] = True
         self.co2_csv_paused[fermenter] = False
         self.co2_csv_last_export_ok[fermenter] = False
@@ -2253,6 +3455,7 @@ class App(tk.Tk):
     def co2_csv_pause(self, fermenter):
         self.co2_csv_running[fermenter] = False
         self.co2_csv_paused[fermenter] = True
+        self._csv_writer.release(self._co2_csv_path(fermenter), timeout=0)
         self._co2_csv_state_led(fermenter, "#eab308")
 
     def co2_csv_export(self, fermenter):
@@ -2260,6 +3463,7 @@ class App(tk.Tk):
             messagebox.showerror("Exportar", "Detén o pausa el CSV antes de exportar.")
             return
         src = self._co2_csv_path(fermenter)
+        self._csv_writer.release(src)
         if not os.path.exists(src):
             messagebox.showerror("Exportar", f"No existe {src}")
             return
@@ -2269,8 +3473,7 @@ class App(tk.Tk):
             return
         try:
             dst = os.path.join(dst_dir, os.path.basename(src))
-            with open(src, "r", encoding="utf-8") as fsrc, open(dst, "w", encoding="utf-8", newline="") as fdst:
-                fdst.write(fsrc.read())
+            shutil.copyfile(src, dst)
             self.co2_csv_last_export_ok[fermenter] = True
             self._co2_csv_state_led(fermenter, "#3b82f6")
             messagebox.showinfo("Exportar", f"Archivo exportado a:\n{dst}")
@@ -2282,6 +3485,7 @@ class App(tk.Tk):
         self.co2_csv_paused[fermenter] = False
         path = self._co2_csv_path(fermenter)
         try:
+            self._csv_writer.release(path)
             if os.path.exists(path):
                 os.remove(path)
             self._co2_csv_state_led(fermenter, "#ef4444")
@@ -2289,82 +3493,70 @@ class App(tk.Tk):
         except Exception as e:
             messagebox.showerror("CSV CO2", f"No se pudo reiniciar.\n{e}")
 
-    def _co2_csv_write_row(self, fermenter, ts, flow, current_ma, voltage, status):
+    def _co2_csv_write_row(self, fermenter, stamp, flow, current_ma, voltage, status):
         if not self.co2_csv_running.get(fermenter, False):
             return
-        row = {
-            "timestamp": ts.strftime("%Y-%m-%d %H:%M:%S"),
-            "fermentador": fermenter,
-            "flow_sccm": f"{flow:.4f}",
-            "status": status,
-        }
-        ipath = self._co2_csv_path(fermenter)
-        header = not os.path.exists(ipath)
-        try:
-            os.makedirs(os.path.dirname(ipath), exist_ok=True)
-            with open(ipath, "a", newline="", encoding="utf-8") as f:
-                w = csv.DictWriter(f, fieldnames=list(row.keys()))
-                if header:
-                    w.writeheader()
-                w.writerow(row)
-        except Exception as e:
-            messagebox.showerror("CSV CO2", f"No se pudo escribir en {ipath}\n{e}")
-
-    def _co2_backup_write_row(self, fermenter, ts, flow, current_ma, voltage, status):
-        path = self.get_co2_backup_path()
-        row = {
-            "timestamp": ts.strftime("%Y-%m-%d %H:%M:%S"),
-            "fermentador": fermenter,
-            "flow_sccm": f"{flow:.4f}",
-            "current_ma": f"{current_ma:.4f}",
-            "voltage": f"{voltage:.4f}",
-            "status": status,
-        }
-        header = not os.path.exists(path) or os.path.getsize(path) == 0
-        try:
-            os.makedirs(os.path.dirname(path), exist_ok=True)
-            with open(path, "a", newline="", encoding="utf-8") as f:
-                w = csv.DictWriter(f, fieldnames=list(row.keys()))
-                if header:
-                    w.writeheader()
-                w.writerow(row)
-        except Exception as e:
-            messagebox.showerror("Backup CO2", f"No se pudo escribir en {path}\n{e}")
+        path = self._co2_csv_path(fermenter)
+        writer = self._csv_writer
+        # Campos sin comas ni comillas (fermentador y estado son fijos): línea armada sin csv.writer
+        writer.submit(path, self._CO2_CSV_FIELDS, f"{stamp},{fermenter},{flow:.4f},{status}\r\n")
+        # Igual que el CSV de temperatura: el error del writer solo se refleja en el LED
+        err = writer.error(path)
+        if err != self.co2_csv_error.get(fermenter):
+            self.co2_csv_error[fermenter] = err
+            self._co2_csv_state_led(fermenter, "#ef4444" if err else "#22c55e")
+
+    def _co2_backup_write_row(self, fermenter, stamp, flow, current_ma, voltage, status):
+        row = f"{stamp},{fermenter},{flow:.4f},{current_ma:.4f},{voltage:.4f},{status}\r\n"
+        self._csv_writer.submit(self.get_co2_backup_path(), self._CO2_BACKUP_CSV_FIELDS, row)
 
     def _record_nut_sample(self, fermenter, ts, state):
+        ts = ts.timestamp()
         state_int = 1 if state else 0
         last_state = self.nut_last_state.get(fermenter)
+        samples = self.nut_samples.get(fermenter)
+        if samples is None:
+            samples = self.nut_samples[fermenter] = deque()
         if last_state is None or state_int != last_state:
-            self.nut_samples.setdefault(fermenter, []).append((ts, state_int))
+            samples.append((ts, state_int))
             self.nut_last_state[fermenter] = state_int
-        samples = self.nut_samples.get(fermenter, [])
-        if not samples:
-            return
-        cutoff = ts - dt.timedelta(hours=MAX_FLOW_HISTORY_HOURS)
-        if samples[0][0] < cutoff:
-            self.nut_samples[fermenter] = [row for row in samples if row[0] >= cutoff]
-
-    def _flow_take_sample(self, fermenter, ts=None):
-        reader = self.flow_readers.get(fermenter)
-        if reader is None:
-            return
-        if ts is None:
-            ts = now()
-        try:
-            voltage = reader.read_voltage()
-        except Exception as exc:
+        # Descarta por la izquierda lo más viejo que la ventana máxima (sin reconstruir la lista)
+        cutoff = ts - MAX_FLOW_HISTORY_SEC
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+
+    def _flow_worker_loop(self):
+        # Hilo productor: la I2C bloqueante (reintentos/timeouts) queda fuera del hilo de Tk.
+        # Es dueño del heap de vencimientos y deja (fermentador, epoch, voltaje, error) en la cola.
+        due = self._flow_due
+        put = self._flow_results.put
+        while not self._flow_stop.is_set():
+            ts = time.time()
+            while due and due[0][0] <= ts and not self._flow_stop.is_set():
+                _, name = heapq.heappop(due)
+                try:
+                    put((name, ts, self.flow_readers[name].read_voltage(), None))
+                except Exception as exc:
+                    put((name, ts, None, exc))
+                # Próximo vencimiento siempre posterior a ts: un período <= 0 no deja la
+                # entrada en la cima del heap (sería un bucle sin fin); a lo sumo 1 por segundo
+                period = self.flow_sample_period[name]
+                next_ts = ts + (period if period > 0 else 1)
+                self.flow_next_sample[name] = next_ts
+                heapq.heappush(due, (next_ts, name))
+            wait = due[0][0] - time.time() if due else 1.0
+            self._flow_stop.wait(min(1.0, max(0.0, wait)))
+
+    def _flow_take_sample(self, fermenter, ts, voltage, exc=None, stamp=None):
+        # ts en epoch (s) del momento de la lectura hecha por el hilo de muestreo;
+        # stamp es ese mismo instante ya formateado (lo comparte toda la pasada)
+        if exc is not None:
             print(f"[FLOW] Error leyendo {fermenter}: {exc}")
-            next_ts = ts + dt.timedelta(seconds=self.flow_sample_period[fermenter])
-            self.flow_next_sample[fermenter] = next_ts
             return
-
-        current_ma = voltage_to_current_ma(voltage, reader.shunt_ohms)
+        reader = self.flow_readers[fermenter]
+        current_ma = voltage * reader.ma_per_volt
         flow = current_to_flow_sccm(current_ma)
-        status = "OK"
-        if current_ma < 3.8:
-            status = "Bajo rango"
-        elif current_ma > 20.5:
-            status = "Alto rango"
+        status = _FLOW_STATUS[(current_ma < 3.8) + 2 * (current_ma > 20.5)]
 
         if FLOW_DEBUG or fermenter in FLOW_DEBUG_FERMS:
             ch_label = f"AIN{reader.channel}"
@@ -2375,25 +3567,43 @@ class App(tk.Tk):
                 f"Q={flow:.2f}SCCM ({status})"
             )
 
-        samples = self.flow_samples.get(fermenter, [])
-        samples.append((ts, flow, current_ma, voltage, status))
-        cutoff = ts - dt.timedelta(hours=MAX_FLOW_HISTORY_HOURS)
-        self.flow_samples[fermenter] = [row for row in samples if row[0] >= cutoff]
-        self._co2_csv_write_row(fermenter, ts, flow, current_ma, voltage, status)
-        self._co2_backup_write_row(fermenter, ts, flow, current_ma, voltage, status)
-        self.flow_next_sample[fermenter] = ts + dt.timedelta(seconds=self.flow_sample_period[fermenter])
+        hist = self.flow_samples[fermenter]
+        hist.append(ts, flow)
+        self.flow_latest[fermenter] = hist.last = (ts, flow, current_ma, voltage, status)
+        if FLOW_IDLE_EMIT_SEC > 0:
+            prev = self._flow_last_emit.get(fermenter)
+            if (
+                prev is not None
+                and status == prev[2] == _FLOW_STATUS[0]
+                and abs(flow - prev[1]) < FLOW_DELTA_SCCM
+                and ts - prev[0] < FLOW_IDLE_EMIT_SEC
+            ):
+                return
+            self._flow_last_emit[fermenter] = (ts, flow, status)
+        if stamp is None:
+            stamp = now_str(dt.datetime.fromtimestamp(ts))
+        self._co2_csv_write_row(fermenter, stamp, flow, current_ma, voltage, status)
+        self._co2_backup_write_row(fermenter, stamp, flow, current_ma, voltage, status)
 
     def _flow_tick(self):
-        ts = now()
-        for name in self.flow_readers:
-            next_ts = self.flow_next_sample.get(name)
-            if next_ts is None or ts >= next_ts:
-                self._flow_take_sample(name, ts=ts)
+        # Drena sin bloquear las muestras que dejó el hilo de muestreo. Las lecturas de una
+        # misma pasada comparten epoch: el texto del timestamp se arma una sola vez.
+        get = self._flow_results.get_nowait
+        take = self._flow_take_sample
+        last_ts = stamp = None
+        while True:
+            try:
+                name, ts, voltage, exc = get()
+            except queue.Empty:
+                return
+            if ts != last_ts:
+                last_ts = ts
+                stamp = now_str(dt.datetime.fromtimestamp(ts))
+            take(name, ts, voltage, exc, stamp)
 
     # ===== gráficos =====
     def open_flow_plot(self, fermenter):
-        mpl_spec = importlib_util.find_spec("matplotlib")
-        if not mpl_spec:
+        if not _has_module("matplotlib"):
             messagebox.showerror("Gráfico", "Instala matplotlib para usar el gráfico en tiempo real.")
             return
         reader = self.flow_readers.get(fermenter)
@@ -2413,21 +3623,70 @@ class App(tk.Tk):
         self._flow_plot_windows[fermenter] = window.top
 
     def open_realtime_plot(self, fermenter=None):
-        mpl_spec = importlib_util.find_spec("matplotlib")
-        if not mpl_spec:
+        if not _has_module("matplotlib"):
             messagebox.showerror("Gráfico", "Instala matplotlib para usar el gráfico en tiempo real.")
             return
         RealTimePlotWindow(self, fermenter=fermenter)
 
     # ===== loop principal =====
+    def _io_drain(self):
+        get = self._io_done.get_nowait
+        while True:
+            try:
+                callback = get()
+            except queue.Empty:
+                return
+            try:
+                callback()
+            except Exception:
+                # Igual que un callback de after(): se informa y el tick sigue
+                self.report_callback_exception(*sys.exc_info())
+
     def _tick(self):
+        self._tick_job = None
         if self._closing:
             return
-        self.clock_var.set(now().strftime("%Y-%m-%d %H:%M:%S"))
+        tnow = now()
+        stamp = now_str(tnow)
+        if self._clock_visible:
+            self.clock_var.set(stamp)
         for f in self.ferms:
-            f.update_process()
+            f.update_process(tnow, stamp)
         self._flow_tick()
-        self._tick_job = self.after(1000, self._tick)
+        self._io_drain()
+        self._check_backup_errors()
+        self._tick_job = self.after(1000, self._tick_cb)
+
+    def _check_backup_errors(self):
+        # Errores del hilo writer en los backups globales (disco lleno, permisos): LED + texto
+        writer = self._csv_writer
+        changed = False
+        for key, path in (("temp", self.get_backup_path()), ("co2", self.get_co2_backup_path())):
+            err = writer.error(path)
+            if err != self._backup_errors[key]:
+                self._backup_errors[key] = err
+                self._backup_leds[key].set_color(Led.OFF_COLOR if err else Led.ON_COLOR)
+                changed = True
+        if changed:
+            labels = {"temp": "temperatura", "co2": "CO2"}
+            self.backup_status_var.set(
+                "   ".join(
+                    f"No se pudo escribir el backup {labels[key]}: {err}"
+                    for key, err in self._backup_errors.items()
+                    if err
+                )
+            )
+
+    def _on_main_map(self, event):
+        # Map/Unmap también llegan de los widgets hijos: solo cuenta la ventana principal
+        if event.widget is not self:
+            return
+        self._clock_visible = True
+        self.clock_var.set(now_str())
+
+    def _on_main_unmap(self, event):
+        if event.widget is self:
+            self._clock_visible = False
 
     def cerrar_todo_global(self):
         for f in self.ferms:
@@ -2459,8 +3718,17 @@ class App(tk.Tk):
         self._flow_plot_windows.clear()
 
         try:
+            # stop_all toca variables/widgets de Tk: se queda en este hilo (el GPIO es inmediato)
             for f in self.ferms:
                 f.stop_all()
+            # Se avisa a todos los hilos antes de esperar a ninguno: las esperas se solapan
+            # (lectura I2C en curso, conversión DS18B20 y último lote del CSV a la vez)
+            self._flow_stop.set()
+            self.hw._poll_stop.set()
+            self._io_pool.shutdown(wait=False, cancel_futures=True)
+            self._csv_writer.stop()
+            if self._flow_worker is not None:
+                self._flow_worker.join(2.0)
             for reader in self.flow_readers.values():
                 try:
                     reader.close()
@@ -2468,6 +3736,7 @@ class App(tk.Tk):
                     pass
             self.hw.cleanup()
         finally:
+            # También los after/after_idle de ventanas de gráficos y widgets (refrescos, redibujos)
             try:
                 for job in self.after_info():
                     try:
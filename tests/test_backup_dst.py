@@ -0,0 +1,47 @@
+import datetime as dt
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import GUI_LITE as G  # noqa: E402
+
+
+@unittest.skipIf(G._pandas() is None or not hasattr(time, "tzset"), "requiere pandas y time.tzset")
+class PandasBackupDstTest(unittest.TestCase):
+    # Un bloque de 400 días cruza dos cambios de horario: el epoch de cada fila tiene que
+    # coincidir con datetime.timestamp(), que es lo que usa el camino con csv.reader.
+
+    def setUp(self):
+        self._old_tz = os.environ.get("TZ")
+
+    def tearDown(self):
+        if self._old_tz is None:
+            os.environ.pop("TZ", None)
+        else:
+            os.environ["TZ"] = self._old_tz
+        time.tzset()
+
+    def _check(self, tz):
+        os.environ["TZ"] = tz
+        time.tzset()
+        start = dt.datetime(2024, 1, 1)
+        stamps = [G.now_str(start + dt.timedelta(seconds=600 * i)) for i in range(400 * 144)]
+        data = "".join(f"{s},F1,{i % 50}.0000,4.0000,0.6000,OK\r\n" for i, s in enumerate(stamps))
+        layout = (0, 1, (("flow", 2, float, "nan"),))
+        series = {}
+        G._parse_backup_rows(data.encode(), layout, start, series)
+        expected = [dt.datetime.fromisoformat(s).timestamp() for s in stamps]
+        self.assertEqual(series["F1"]["ts"], expected)
+
+    def test_santiago(self):
+        self._check("America/Santiago")
+
+    def test_madrid(self):
+        self._check("Europe/Madrid")
+
+
+if __name__ == "__main__":
+    unittest.main()